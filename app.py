@@ -1,19 +1,60 @@
 # app.py
 
+import math
+from concurrent.futures import as_completed
+import numpy as np
+import pandas as pd
+import matplotlib.pyplot as plt
 import streamlit as st
-import simpy
-import random
-from hospital import Hospital
-from processes import patient_arrivals
-from data_analysis import analyze_data
-
-def run_simulation(config):
-    random.seed(config['RANDOM_SEED'])
-    env = simpy.Environment()
-    hospital = Hospital(env, config)
-    env.process(patient_arrivals(env, hospital, config))
-    env.run(until=config['SIM_TIME'])
-    return hospital
+from simulation import make_config
+from service import SimulationService
+from batch import BatchResult, t_quantile
+
+# Resources drawn with confidence bands when several replications are run
+BAND_RESOURCES = ['doctor', 'nurse', 'bed']
+
+@st.cache_resource
+def simulation_service():
+    """One pool and result cache per Streamlit server, shared by every session."""
+    return SimulationService()
+
+def show_results(result):
+    """Renders an AnalysisResult in the Streamlit page."""
+    st.metric('Average Total Time in System (minutes)', f"{result.total_time['mean']:.2f}")
+    st.subheader('Stage Waiting and Service Times (minutes)')
+    st.dataframe(result.stages)
+    st.subheader('Resource Utilization')
+    st.bar_chart({name: stats['utilization'] for name, stats in result.utilization.items()})
+    st.subheader('Breakdown by Patient Type')
+    st.dataframe(result.by_type)
+    st.subheader('Breakdown by Severity')
+    st.dataframe(result.by_severity)
+
+def show_intervals(batch, confidence):
+    """Renders the KPIs of several replications as mean ± half-width."""
+    rows = {kpi: {'mean': mean, 'half_width': half_width}
+            for kpi, (mean, half_width) in batch.intervals(confidence).items()}
+    st.subheader(f'KPIs over {len(batch.summaries)} replications ({round(confidence * 100)}% CI)')
+    st.dataframe(pd.DataFrame.from_dict(rows, orient='index'))
+
+def show_bands(resource_logs, confidence):
+    """Plots mean utilization over time with a confidence band per resource."""
+    n = len(resource_logs)
+    length = min(len(log['time']) for log in resource_logs)
+    times = resource_logs[0]['time'][:length]
+    t = t_quantile(0.5 + confidence / 2, n - 1)
+    fig, ax = plt.subplots(figsize=(10, 5))
+    for name in BAND_RESOURCES:
+        values = np.array([log[f'{name}_utilization'][:length] for log in resource_logs])
+        mean = values.mean(axis=0)
+        half_width = t * values.std(axis=0, ddof=1) / math.sqrt(n)
+        ax.plot(times, mean, label=name.title())
+        ax.fill_between(times, mean - half_width, mean + half_width, alpha=0.25)
+    ax.set_xlabel('Time (minutes)')
+    ax.set_ylabel('Utilization')
+    ax.set_title('Resource Utilization Over Time')
+    ax.legend()
+    st.pyplot(fig)
 
 def main():
     st.title('Healthcare Logistics Simulation Tool')
@@ -22,37 +63,44 @@ def main():
     NUM_DOCTORS = st.sidebar.number_input('Number of Doctors', min_value=1, value=3)
     NUM_NURSES = st.sidebar.number_input('Number of Nurses', min_value=1, value=5)
     NUM_BEDS = st.sidebar.number_input('Number of Beds', min_value=1, value=10)
+    NUM_SPECIALISTS = st.sidebar.number_input('Number of Specialists', min_value=1, value=2)
+    NUM_OPERATING_ROOMS = st.sidebar.number_input('Number of Operating Rooms', min_value=1, value=1)
     SIM_TIME = st.sidebar.number_input('Simulation Time (minutes)', min_value=1, value=480)
     RANDOM_SEED = st.sidebar.number_input('Random Seed', min_value=1, value=42)
     SHIFT_DURATION = st.sidebar.number_input('Shift Duration (minutes)', min_value=1, value=240)
     BREAK_DURATION = st.sidebar.number_input('Break Duration (minutes)', min_value=1, value=15)
-    # Add more parameters as needed
+    replications = st.sidebar.number_input('Replications', min_value=1, value=1)
+    confidence = st.sidebar.slider('Confidence Level', min_value=0.80, max_value=0.99, value=0.95)
 
     if st.button('Run Simulation'):
-        config = {
-            'NUM_DOCTORS': NUM_DOCTORS,
-            'NUM_NURSES': NUM_NURSES,
-            'NUM_BEDS': NUM_BEDS,
-            'NUM_SPECIALISTS': 2,  # You can add inputs for these as well
-            'NUM_ADMIN_STAFF': 3,
-            'NUM_SUPPORT_STAFF': 4,
-            'NUM_OPERATING_ROOMS': 1,
-            'NUM_LABS': 2,
-            'NUM_IMAGING_CENTERS': 1,
-            'NUM_MEDICAL_EQUIPMENT': 5,
-            'SHIFT_DURATION': SHIFT_DURATION,
-            'BREAK_DURATION': BREAK_DURATION,
-            'SIM_TIME': SIM_TIME,
-            'RANDOM_SEED': RANDOM_SEED,
-        }
-
-        st.write('Running simulation...')
-        hospital = run_simulation(config)
-        st.write('Simulation completed.')
+        config = make_config(
+            NUM_DOCTORS=NUM_DOCTORS,
+            NUM_NURSES=NUM_NURSES,
+            NUM_BEDS=NUM_BEDS,
+            NUM_SPECIALISTS=NUM_SPECIALISTS,
+            NUM_OPERATING_ROOMS=NUM_OPERATING_ROOMS,
+            SHIFT_DURATION=SHIFT_DURATION,
+            BREAK_DURATION=BREAK_DURATION,
+            SIM_TIME=SIM_TIME,
+            RANDOM_SEED=RANDOM_SEED,
+        )
+
+        # Runs go to the shared background pool; cached or in-flight
+        # identical runs are not simulated again
+        futures = simulation_service().submit_replications(config, replications)
+        progress = st.progress(0.0, text='Running simulation...')
+        for done, _ in enumerate(as_completed(futures), 1):
+            progress.progress(done / len(futures), text=f'{done} of {len(futures)} replications finished')
+        results = [future.result() for future in futures]
+        progress.empty()
 
         # Data Analysis
-        from data_analysis import analyze_data_streamlit
-        analyze_data_streamlit(hospital)
+        if len(results) == 1:
+            show_results(results[0][0])
+            return
+        summaries = [result.kpis() for result, _ in results]
+        show_intervals(BatchResult(config, summaries), confidence)
+        show_bands([resource_log for _, resource_log in results], confidence)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    main()
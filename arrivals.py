@@ -0,0 +1,201 @@
+# arrivals.py
+
+from bisect import bisect_right
+from math import ceil, inf
+
+# Minutes in the default rate cycle
+DAY = 24 * 60
+
+# Patient types: default arrival rate (patients per minute) and severity range.
+# The rates keep the original 1:2:7 mix and its mean gap of 13 minutes.
+PATIENT_TYPES = {
+    'emergency': (1 / 130, (4, 5)),
+    'scheduled': (2 / 130, (2, 3)),
+    'walk-in': (7 / 130, (1, 4)),
+}
+INTERPOLATIONS = ('step', 'spline')
+
+
+class RateProfile:
+    """Periodic arrival rate (patients per minute) of one patient type.
+
+    times are knot offsets into a cycle of length period, starting at 0.
+    'step' holds rates[i] from times[i] up to the next knot; 'spline' is
+    a periodic cubic (Catmull-Rom) through the knots, clipped at 0.
+    Each segment has a constant upper bound on the rate: for 'step' it is
+    the rate itself, so arrivals are drawn by exact inversion; for
+    'spline' it is the largest Bezier control point of the segment, and
+    candidates from that bound are thinned.
+    """
+
+    def __init__(self, times, rates, period=DAY, interpolation='step'):
+        times = [float(t) for t in times]
+        rates = [float(r) for r in rates]
+        if not times or len(times) != len(rates):
+            raise ValueError('A rate profile needs as many rates as knot times')
+        if times[0] != 0 or any(b <= a for a, b in zip(times, times[1:])) or times[-1] >= period:
+            raise ValueError(f'Knot times must increase from 0 and stay below the period ({period})')
+        if min(rates) < 0:
+            raise ValueError('Arrival rates cannot be negative')
+        if interpolation not in INTERPOLATIONS:
+            raise ValueError(f"Unknown interpolation: {interpolation}; expected one of {', '.join(INTERPOLATIONS)}")
+        self.times = times
+        self.rates = rates
+        self.period = period
+        self.interpolation = interpolation
+        self.ends = times[1:] + [period]
+        self.exact = interpolation == 'step' or len(times) == 1
+        if self.exact:
+            self.slopes = [0.0] * len(times)
+            self.bounds = list(rates)
+        else:
+            self.slopes = self._tangents()
+            self.bounds = [self._segment_bound(i) for i in range(len(times))]
+        self.peak = max(self.bounds)
+
+    def _tangents(self):
+        """Catmull-Rom tangents of the periodic knot sequence."""
+        n = len(self.times)
+        slopes = []
+        for i in range(n):
+            before = self.times[i - 1] - (self.period if i == 0 else 0)
+            after = self.times[(i + 1) % n] + (self.period if i == n - 1 else 0)
+            slopes.append((self.rates[(i + 1) % n] - self.rates[i - 1]) / (after - before))
+        return slopes
+
+    def _segment_bound(self, i):
+        # A cubic segment stays within the hull of its Bezier control points
+        h = self.ends[i] - self.times[i]
+        r0, r1 = self.rates[i], self.rates[(i + 1) % len(self.times)]
+        m0, m1 = self.slopes[i], self.slopes[(i + 1) % len(self.times)]
+        return max(r0, r1, r0 + m0 * h / 3, r1 - m1 * h / 3, 0.0)
+
+    def scaled(self, factor):
+        """The same profile with every rate multiplied by factor."""
+        return RateProfile(self.times, [rate * factor for rate in self.rates], self.period, self.interpolation)
+
+    def _rate_in(self, i, offset):
+        if self.exact:
+            return self.rates[i]
+        n = len(self.times)
+        h = self.ends[i] - self.times[i]
+        s = (offset - self.times[i]) / h
+        r0, r1 = self.rates[i], self.rates[(i + 1) % n]
+        m0, m1 = self.slopes[i] * h, self.slopes[(i + 1) % n] * h
+        s2, s3 = s * s, s * s * s
+        rate = (2 * s3 - 3 * s2 + 1) * r0 + (s3 - 2 * s2 + s) * m0 + (-2 * s3 + 3 * s2) * r1 + (s3 - s2) * m1
+        return rate if rate > 0 else 0.0
+
+    def rate(self, time):
+        """Arrival rate at an absolute time."""
+        offset = time % self.period
+        return self._rate_in(bisect_right(self.times, offset) - 1, offset)
+
+    def mean_rate(self, samples=1000):
+        """Average rate over one cycle."""
+        if self.exact:
+            return sum(r * (e - t) for r, t, e in zip(self.rates, self.times, self.ends)) / self.period
+        return sum(self.rate((k + 0.5) * self.period / samples) for k in range(samples)) / samples
+
+    def next_arrival(self, now, rng):
+        """Time of the first arrival after now, or inf if there is none.
+
+        Spends an Exp(1) draw of cumulative bound rate to find the next
+        candidate (inversion of the piecewise-constant bound), then keeps it
+        with probability rate / bound; 'step' profiles keep every candidate.
+        """
+        if self.peak <= 0:
+            return inf
+        period, times, ends, bounds = self.period, self.times, self.ends, self.bounds
+        last = len(times) - 1
+        cycle, offset = divmod(now, period)
+        i = bisect_right(times, offset) - 1
+        while True:
+            need = rng.expovariate(1)
+            while True:
+                bound = bounds[i]
+                if bound > 0:
+                    step = need / bound
+                    if offset + step < ends[i]:
+                        offset += step
+                        break
+                    need -= (ends[i] - offset) * bound
+                if i == last:
+                    i, offset, cycle = 0, 0.0, cycle + 1
+                else:
+                    i += 1
+                    offset = times[i]
+            if self.exact or rng.random() * bound <= self._rate_in(i, offset):
+                return cycle * period + offset
+
+    def schedule(self, horizon, generator, start=0.0):
+        """Every arrival in [start, horizon) in one vectorized pass.
+
+        generator is a numpy.random.Generator. Each segment of the bound
+        gets a Poisson number of uniformly placed candidates, which are
+        thinned against the spline where the bound is not exact. Returns
+        a sorted float array.
+        """
+        import numpy as np
+        n = len(self.times)
+        cycles = np.arange(int(start // self.period), max(int(ceil(horizon / self.period)), 1))
+        offsets = cycles[:, None] * self.period
+        lo = np.clip((offsets + np.asarray(self.times)).ravel(), start, horizon)
+        hi = np.clip((offsets + np.asarray(self.ends)).ravel(), start, horizon)
+        bound = np.tile(np.asarray(self.bounds), len(cycles))
+        counts = generator.poisson(bound * (hi - lo))
+        segment = np.repeat(np.arange(lo.size), counts)
+        arrivals = lo[segment] + generator.random(segment.size) * (hi - lo)[segment]
+        if not self.exact:
+            keep = generator.random(segment.size) * bound[segment] <= self._rate_array(arrivals, segment % n)
+            arrivals = arrivals[keep]
+        arrivals.sort()
+        return arrivals
+
+    def _rate_array(self, arrivals, index):
+        import numpy as np
+        n = len(self.times)
+        times, ends = np.asarray(self.times)[index], np.asarray(self.ends)[index]
+        h = ends - times
+        s = (arrivals % self.period - times) / h
+        rates, slopes = np.asarray(self.rates), np.asarray(self.slopes)
+        nxt = (index + 1) % n
+        r0, r1, m0, m1 = rates[index], rates[nxt], slopes[index] * h, slopes[nxt] * h
+        s2, s3 = s * s, s * s * s
+        rate = (2 * s3 - 3 * s2 + 1) * r0 + (s3 - 2 * s2 + s) * m0 + (-2 * s3 + 3 * s2) * r1 + (s3 - s2) * m1
+        return np.maximum(rate, 0.0)
+
+
+def arrival_profiles(config):
+    """Rate profile of every patient type, with ARRIVAL_SCALE applied.
+
+    config['ARRIVAL_PROFILES'] may replace the constant default of a type
+    with {'times': [...], 'rates': [...], 'period': minutes,
+    'interpolation': 'step' | 'spline'}; rates are patients per minute.
+    """
+    overrides = config.get('ARRIVAL_PROFILES') or {}
+    unknown = [name for name in overrides if name not in PATIENT_TYPES]
+    if unknown:
+        raise ValueError(f"Unknown patient type in ARRIVAL_PROFILES: {', '.join(unknown)}")
+    scale = config.get('ARRIVAL_SCALE', 1)
+    profiles = {}
+    for name, (rate, _) in PATIENT_TYPES.items():
+        spec = overrides.get(name)
+        if spec is None:
+            profile = RateProfile([0], [rate])
+        else:
+            profile = RateProfile(spec['times'], spec['rates'], spec.get('period', DAY),
+                                  spec.get('interpolation', 'step'))
+        profiles[name] = profile.scaled(scale) if scale != 1 else profile
+    return profiles
+
+
+def arrival_schedules(config, horizon, seed):
+    """Pre-generated arrival times of every patient type up to horizon.
+
+    One vectorized call per type, each on its own NumPy stream; returns
+    {patient type: sorted array of times}.
+    """
+    from rng import numpy_generator
+    return {name: profile.schedule(horizon, numpy_generator(seed, f'arrivals/{name}/schedule'))
+            for name, profile in arrival_profiles(config).items()}
@@ -0,0 +1,139 @@
+# batch.py
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from statistics import NormalDist
+from data_analysis import STAGES, UTILIZATION_RESOURCES
+from cache import run_summary
+from rng import replication_seeds
+from warmup import resolve_warmup
+
+
+def run_replication(job):
+    """Runs one (config, seed[, cache]) job and returns its compact KPI summary."""
+    config, seed, *rest = job
+    summary = dict(run_summary(config, seed, cache=rest[0] if rest else None))
+    summary['seed'] = seed
+    return summary
+
+
+def t_quantile(p, df):
+    """Student t quantile (Hill's approximation, algorithm 396)."""
+    if p == 0.5:
+        return 0.0
+    if p < 0.5:
+        return -t_quantile(1 - p, df)
+    two_tail = 2 * (1 - p)
+    n = df
+    if n == 1:
+        return math.tan(math.pi * (p - 0.5))
+    if n == 2:
+        return math.sqrt(2 / (two_tail * (2 - two_tail)) - 2)
+    a = 1 / (n - 0.5)
+    b = 48 / (a * a)
+    c = ((20700 * a / b - 98) * a - 16) * a + 96.36
+    d = ((94.5 / (b + c) - 3) / b + 1) * math.sqrt(a * math.pi / 2) * n
+    x = d * two_tail
+    y = x ** (2 / n)
+    if y > 0.05 + a:
+        x = NormalDist().inv_cdf(0.5 * two_tail)
+        y = x * x
+        if n < 5:
+            c += 0.3 * (n - 4.5) * (x + 0.6)
+        c = (((0.05 * d * x - 5) * x - 7) * x - 2) * x + b + c
+        y = (((((0.4 * y + 6.3) * y + 36) * y + 94.5) / c - y - 3) / b + 1) * x
+        y = a * y * y
+        y = math.expm1(y) if y > 0.002 else 0.5 * y * y + y
+    else:
+        y = ((1 / (((n + 6) / (n * y) - 0.089 * d - 0.822) * (n + 2) * 3) + 0.5 / (n + 4)) * y - 1) * (n + 1) / (n + 2) + 1 / y
+    return math.sqrt(n * y)
+
+
+def confidence_interval(values, confidence=0.95):
+    """Returns (mean, half_width) of a t confidence interval for the mean."""
+    values = [v for v in values if not math.isnan(v)]
+    n = len(values)
+    if n == 0:
+        return float('nan'), float('nan')
+    mean = sum(values) / n
+    if n == 1:
+        return mean, float('inf')
+    variance = sum((v - mean) ** 2 for v in values) / (n - 1)
+    half_width = t_quantile(0.5 + confidence / 2, n - 1) * math.sqrt(variance / n)
+    return mean, half_width
+
+
+class BatchResult:
+    """Per-replication summaries of one configuration and their intervals."""
+
+    def __init__(self, config, summaries):
+        self.config = config
+        self.summaries = summaries
+
+    @property
+    def seeds(self):
+        return [summary['seed'] for summary in self.summaries]
+
+    def kpis(self):
+        return [key for key in self.summaries[0] if key != 'seed'] if self.summaries else []
+
+    def intervals(self, confidence=0.95):
+        """Returns {kpi: (mean, half_width)} across replications."""
+        return {
+            key: confidence_interval([summary[key] for summary in self.summaries], confidence)
+            for key in self.kpis()
+        }
+
+    def report(self, confidence=0.95):
+        """Prints the analyze_data KPIs with confidence intervals."""
+        intervals = self.intervals(confidence)
+        level = round(confidence * 100)
+
+        def line(label, key, unit):
+            mean, half_width = intervals[key]
+            print(f"  {label}: {mean:.2f} ± {half_width:.2f}{unit}")
+
+        print(f"\nBatch of {len(self.summaries)} replications ({level}% confidence intervals):")
+        line('Average Total Time in System', 'total_time_mean', ' minutes')
+        print("Average Waiting Times:")
+        for key in STAGES:
+            line(key.title(), f'{key}_wait_mean', ' minutes')
+        print("Average Service Times:")
+        for key in STAGES:
+            line(key.title(), f'{key}_service_mean', ' minutes')
+        print("\nAverage Resource Utilization:")
+        for resource in UTILIZATION_RESOURCES:
+            mean, half_width = intervals[f'{resource}_utilization']
+            print(f"  {resource.title().replace('_', ' ')}: {mean * 100:.2f}% ± {half_width * 100:.2f}%")
+        print("\nBottleneck Analysis:")
+        for key in STAGES:
+            line(f'Maximum {key.title()} Wait Time', f'{key}_wait_max', ' minutes')
+
+
+def run_batch(config, replications, workers=None, base_seed=None, cache=None):
+    """Runs independent replications of config across a process pool.
+
+    workers defaults to one per core; workers=1 runs in-process. Seeds are
+    derived from base_seed (default config['RANDOM_SEED']). With a
+    ResultCache, replications already run are read back instead.
+    """
+    if base_seed is None:
+        base_seed = config['RANDOM_SEED']
+    # Detect the warm-up once from a pilot, not once per replication
+    config = resolve_warmup(config, base_seed)
+    if workers is None:
+        workers = os.cpu_count() or 1
+    jobs = [(config, seed, cache) for seed in replication_seeds(base_seed, replications)]
+    if workers == 1:
+        summaries = [run_replication(job) for job in jobs]
+    else:
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            summaries = list(executor.map(run_replication, jobs, chunksize=chunksize))
+    return BatchResult(config, summaries)
+
+
+if __name__ == '__main__':
+    from simulation import DEFAULT_CONFIG
+    run_batch(DEFAULT_CONFIG, 20).report()
@@ -0,0 +1,205 @@
+# benchmark.py
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+
+# Probes import the simulation modules from this directory, whatever the caller's cwd
+HERE = os.path.dirname(os.path.abspath(__file__))
+# Reference results compared by default. Throughput is machine-specific:
+# regenerate with python benchmark.py --baseline '' --output benchmarks/baseline.json
+BASELINE_PATH = os.path.join(HERE, 'benchmarks', 'baseline.json')
+
+# Import-time budgets in milliseconds (best of several fresh interpreters),
+# about twice the typical times (~45, ~45 and ~70 ms) to absorb machine noise.
+# The core must import with simpy alone; most of its budget is simpy itself.
+IMPORT_BUDGETS = {
+    'entities, hospital, processes': 100,
+    'simulation': 100,
+    'main': 140,
+}
+# Modules the core and the headless CLI must not load at import time
+HEAVY_MODULES = ['numpy', 'pandas', 'matplotlib', 'seaborn', 'tkinter', 'streamlit']
+
+# Standard scenarios, as overrides of DEFAULT_CONFIG
+SCENARIOS = {
+    'baseline': {},
+    'week': {'SIM_TIME': 7 * 24 * 60},
+    'disaster_surge': {'SIM_TIME': 24 * 60, 'DISASTER_PROBABILITY': 0.5},
+    'scaled_10x': {
+        'NUM_DOCTORS': 30, 'NUM_NURSES': 50, 'NUM_BEDS': 100, 'NUM_SPECIALISTS': 20,
+        'NUM_ADMIN_STAFF': 30, 'NUM_SUPPORT_STAFF': 40, 'NUM_OPERATING_ROOMS': 10,
+        'NUM_LABS': 20, 'NUM_IMAGING_CENTERS': 10, 'NUM_MEDICAL_EQUIPMENT': 50,
+        'ARRIVAL_SCALE': 10,
+    },
+}
+# Each scenario is repeated until at least this much wall time has been measured
+MIN_SECONDS = 1.0
+# Throughput may drop this much against the baseline before it counts as a regression
+DEFAULT_TOLERANCE = 0.10
+# Metrics compared against the baseline; higher is better for all of them
+THROUGHPUT_METRICS = ['events_per_second', 'patients_per_second']
+
+_IMPORT_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {modules}
+elapsed = time.perf_counter() - start
+print(json.dumps([elapsed * 1000, [m for m in {heavy!r} if m in sys.modules]]))
+'''
+
+
+def import_time(modules, repeats=5):
+    """Best-of-repeats time (ms) to import modules in a fresh interpreter,
+    and the heavy modules that import pulled in."""
+    best, heavy = float('inf'), []
+    for _ in range(repeats):
+        probe = _IMPORT_PROBE.format(modules=modules, heavy=HEAVY_MODULES)
+        output = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True,
+                                cwd=HERE).stdout
+        elapsed, heavy = json.loads(output.splitlines()[-1])
+        best = min(best, elapsed)
+    return best, heavy
+
+
+def check_import_budgets(budgets=IMPORT_BUDGETS, repeats=5):
+    """Measures every budgeted import; returns (results, ok)."""
+    results = {}
+    ok = True
+    for modules, budget in budgets.items():
+        elapsed, heavy = import_time(modules, repeats)
+        passed = elapsed <= budget and not heavy
+        ok = ok and passed
+        results[modules] = {'ms': elapsed, 'budget_ms': budget, 'heavy_modules': heavy, 'ok': passed}
+    return results, ok
+
+
+def run_scenario(name, repeats=5, seed=None):
+    """Runs one scenario headlessly in this process; returns its measurements.
+
+    Wall time is the best of at least repeats runs (printing is off: no
+    tracer). Events are counted from simpy's event id counter, patients
+    are those discharged, and analyze_seconds is the time to compute the
+    KPIs of the last run. Peak RSS is the process high-water mark before
+    the analysis, so call this in a fresh process (see measure_scenario).
+    """
+    import resource
+    from simulation import DEFAULT_CONFIG, build_simulation
+    from data_analysis import analyze
+    config = dict(DEFAULT_CONFIG, **SCENARIOS[name])
+    best = float('inf')
+    runs = total = 0
+    # Short scenarios are repeated for at least MIN_SECONDS to steady the best time
+    while runs < repeats or total < MIN_SECONDS:
+        env, hospital = build_simulation(config, seed=seed)
+        start = time.perf_counter()
+        env.run(until=config['SIM_TIME'])
+        elapsed = time.perf_counter() - start
+        best = min(best, elapsed)
+        total += elapsed
+        runs += 1
+    # Every scheduled event takes the next id; reading it costs one id
+    events = next(env._eid)
+    patients = len(hospital.patients)
+    # Peak RSS of the simulation, before pandas is loaded for the analysis
+    peak_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    if sys.platform != 'darwin':
+        peak_rss *= 1024  # Linux reports kilobytes
+    import pandas  # noqa: F401  Time the analysis itself, not the first pandas import
+    start = time.perf_counter()
+    analyze(hospital)
+    analyze_seconds = time.perf_counter() - start
+    return {
+        'sim_time': config['SIM_TIME'],
+        'seconds': best,
+        'events': events,
+        'patients': patients,
+        'events_per_second': events / best,
+        'patients_per_second': patients / best,
+        'peak_rss_mb': peak_rss / 2 ** 20,
+        'analyze_seconds': analyze_seconds,
+    }
+
+
+def measure_scenario(name, repeats=5, seed=None):
+    """run_scenario in a fresh interpreter, so peak RSS is the scenario's own."""
+    probe = f'import json, benchmark; print(json.dumps(benchmark.run_scenario({name!r}, {repeats}, {seed!r})))'
+    output = subprocess.run([sys.executable, '-c', probe], capture_output=True, text=True, check=True,
+                            cwd=HERE).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def run_benchmarks(names=None, repeats=5, seed=None):
+    """Measures the scenarios and import budgets; returns a JSON-ready dict."""
+    names = names or list(SCENARIOS)
+    imports, _ = check_import_budgets()
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'scenarios': {name: measure_scenario(name, repeats, seed) for name in names},
+        'imports': imports,
+    }
+
+
+def compare(results, baseline, tolerance=DEFAULT_TOLERANCE):
+    """Returns the regressions of results against baseline as readable strings."""
+    regressions = []
+    for name, current in results['scenarios'].items():
+        reference = baseline.get('scenarios', {}).get(name)
+        if reference is None:
+            continue
+        for metric in THROUGHPUT_METRICS:
+            if current[metric] < reference[metric] * (1 - tolerance):
+                change = current[metric] / reference[metric] - 1
+                regressions.append(f'{name}: {metric} {current[metric]:.0f} vs {reference[metric]:.0f} ({change:+.1%})')
+    for modules, current in results['imports'].items():
+        if not current['ok']:
+            regressions.append(f"import {modules}: {current['ms']:.1f} ms over {current['budget_ms']} ms budget"
+                               + (f" or loaded {', '.join(current['heavy_modules'])}" if current['heavy_modules'] else ''))
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmarks the simulation core')
+    parser.add_argument('scenarios', nargs='*', help=f"Scenarios to run: {', '.join(SCENARIOS)} (default: all)")
+    parser.add_argument('--repeats', type=int, default=5, help='Runs per scenario; the fastest counts')
+    parser.add_argument('--seed', type=int, help='Replication seed (default: RANDOM_SEED)')
+    parser.add_argument('--output', help='Write the results as JSON')
+    parser.add_argument('--baseline', default=BASELINE_PATH,
+                        help='Compare against this results file and fail on regressions '
+                             "(default: benchmarks/baseline.json; '' to skip)")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE,
+                        help='Allowed relative throughput drop against the baseline')
+    args = parser.parse_args(argv)
+    unknown = [name for name in args.scenarios if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenario: {', '.join(unknown)}")
+
+    results = run_benchmarks(args.scenarios, args.repeats, args.seed)
+    for name, result in results['scenarios'].items():
+        print(f"{name}: {result['events_per_second']:,.0f} events/s, "
+              f"{result['patients_per_second']:,.0f} patients/s, {result['seconds']:.3f} s, "
+              f"peak RSS {result['peak_rss_mb']:.1f} MB, analyze {result['analyze_seconds'] * 1000:.1f} ms")
+    for modules, result in results['imports'].items():
+        status = 'ok' if result['ok'] else 'OVER BUDGET'
+        heavy = f" (loaded {', '.join(result['heavy_modules'])})" if result['heavy_modules'] else ''
+        print(f"import {modules}: {result['ms']:.1f} ms / {result['budget_ms']} ms {status}{heavy}")
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+
+    regressions = [f"import {m}" for m, r in results['imports'].items() if not r['ok']]
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as f:
+            regressions = compare(results, json.load(f), args.tolerance)
+    for regression in regressions:
+        print(f'REGRESSION {regression}')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,208 @@
+# cache.py
+
+import hashlib
+import json
+import math
+import os
+import pickle
+import tempfile
+import simpy
+from simulation import DEFAULT_CONFIG, run_simulation
+from data_analysis import analyze, summarize
+
+# Modules whose source determines simulation results; editing any of them
+# changes the model version and so invalidates every cached entry
+MODEL_MODULES = [
+    'simulation.py', 'hospital.py', 'processes.py', 'entities.py', 'monitoring.py',
+    'rng.py', 'sampling.py', 'patient_store.py', 'online_stats.py', 'warmup.py',
+    'data_analysis.py', 'roster.py', 'arrivals.py', 'replay.py',
+]
+
+# Shared by every front end unless HOSPITAL_SIM_CACHE points elsewhere
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cache', 'healthcare_simulation')
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# Cached analyses keep at most about this many utilization samples per resource
+ANALYSIS_POINTS = 2000
+
+_model_version = None
+
+
+def model_version():
+    """Digest of the model source files and the simpy version."""
+    global _model_version
+    if _model_version is None:
+        digest = hashlib.sha256(simpy.__version__.encode())
+        here = os.path.dirname(os.path.abspath(__file__))
+        for name in MODEL_MODULES:
+            digest.update(name.encode())
+            with open(os.path.join(here, name), 'rb') as f:
+                digest.update(f.read())
+        _model_version = digest.hexdigest()
+    return _model_version
+
+
+def normalize_config(config):
+    """Full config (defaults filled in) with integral floats made ints.
+
+    Front ends build partial configs and number widgets may return 3.0
+    for 3; both must map to the same cache entry.
+    """
+    normalized = dict(DEFAULT_CONFIG)
+    normalized.update(config)
+    for key, value in normalized.items():
+        if isinstance(value, float) and value.is_integer():
+            normalized[key] = int(value)
+    return normalized
+
+
+def cache_key(config, seed=None, kind='summary'):
+    """Content address of one (config, seed, model version) result of a kind."""
+    config = normalize_config(config)
+    if seed is None:
+        seed = config['RANDOM_SEED']
+    payload = {'config': config, 'seed': seed, 'kind': kind, 'version': model_version()}
+    if config.get('ARRIVAL_LOG'):
+        # A replayed log is part of the input; a rewritten file is a new entry
+        stat = os.stat(config['ARRIVAL_LOG'])
+        payload['arrival_log'] = [stat.st_size, stat.st_mtime_ns]
+    payload = json.dumps(payload, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    """Size-bounded on-disk cache of pickled results, shared across processes.
+
+    Entries are written to a temporary file and renamed into place, so
+    readers never see a partial entry. Reads touch the entry's mtime and
+    eviction removes the least recently used entries until the cache is
+    under max_bytes. A running total of the entry sizes, read from disk
+    once, keeps put from walking the directory unless the budget is
+    exceeded; other processes' writes are picked up at that walk.
+    """
+
+    def __init__(self, directory=None, max_bytes=DEFAULT_MAX_BYTES):
+        if directory is None:
+            directory = os.environ.get('HOSPITAL_SIM_CACHE', DEFAULT_CACHE_DIR)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.size = None
+
+    def path(self, key):
+        return os.path.join(self.directory, key[:2], key + '.pkl')
+
+    def get(self, key, default=None):
+        path = self.path(key)
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except (OSError, EOFError, pickle.UnpicklingError):
+            # Missing, evicted by another process meanwhile, or unreadable
+            return default
+        return value
+
+    def put(self, key, value):
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if self.size is None:
+            self.size = sum(size for _, size, _ in self.entries())
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+                size = f.tell()
+            replaced = _file_size(path)
+            os.replace(tmp, path)
+        except BaseException:
+            os.unlink(tmp)
+            raise
+        self.size += size - replaced
+        if self.size > self.max_bytes:
+            self.evict()
+
+    def entries(self):
+        """Returns [(mtime, size, path)] of every entry."""
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith('.pkl'):
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+        return entries
+
+    def evict(self):
+        """Removes least recently used entries until under max_bytes."""
+        entries = self.entries()
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+            total -= size
+        self.size = total
+
+    def clear(self):
+        for _, _, path in self.entries():
+            try:
+                os.unlink(path)
+            except OSError:
+                pass
+        self.size = 0
+
+    def fetch(self, config, seed, kind, compute):
+        """Returns the cached result of kind, computing and storing it on a miss."""
+        key = cache_key(config, seed, kind)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value)
+        return value
+
+
+def _file_size(path):
+    """Size of the entry at path, 0 if there is none."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return 0
+
+
+def run_summary(config, seed=None, cache=None):
+    """KPI summary of one replication, from cache when possible."""
+    def compute():
+        return summarize(run_simulation(config, seed=seed))
+    if cache is None:
+        return compute()
+    return cache.fetch(config, seed, 'summary', compute)
+
+
+def analysis_entry(hospital):
+    """(compact AnalysisResult, utilization series) of a finished run.
+
+    The series is columnar (see UtilizationTracker.series), without queue
+    lengths, and sampled coarsely enough to hold about ANALYSIS_POINTS
+    points, so a week-long run caches in a few hundred kilobytes.
+    """
+    config = hospital.config
+    resolution = max(config.get('UTILIZATION_RESOLUTION', 1), math.ceil(config['SIM_TIME'] / ANALYSIS_POINTS))
+    return analyze(hospital).compact(), hospital.utilization.series(resolution)
+
+
+def run_analysis(config, seed=None, cache=None):
+    """analysis_entry of one replication, from cache when possible.
+
+    This is what the CLI and the GUIs render, so a repeated what-if
+    needs neither the simulation nor the analysis.
+    """
+    def compute():
+        return analysis_entry(run_simulation(config, seed=seed))
+    if cache is None:
+        return compute()
+    return cache.fetch(config, seed, 'analysis', compute)
@@ -1,65 +1,175 @@
 # data_analysis.py
 
-import pandas as pd
-import matplotlib.pyplot as plt
+# pandas and matplotlib are imported on first use, so the simulation core
+# and batch workers start without them
+from entities import STAGES, SEVERITY_LEVELS
+from patient_store import TYPE_NAMES
+from online_stats import PERCENTILES
 
-def analyze_data(hospital):
-    """Analyzes collected data and generates reports."""
-    # Create DataFrame from patient data
-    patient_data = []
-    for patient in hospital.patients:
-        data = {
-            'patient_id': patient.patient_id,
-            'patient_type': patient.patient_type,
-            'severity_level': patient.severity_level,
-            'arrival_time': patient.arrival_time,
-            'total_time_in_system': patient.timestamps['discharge'] - patient.arrival_time
-        }
-        # Calculate wait times and service times
-        for key in ['registration', 'triage', 'diagnostics', 'surgery', 'treatment', 'recovery']:
-            wait_key = f'{key}_wait'
-            start_key = f'{key}_start'
-            end_key = f'{key}_end'
-            data[f'{key}_wait_time'] = patient.timestamps.get(wait_key, 0)
-            if start_key in patient.timestamps and end_key in patient.timestamps:
-                data[f'{key}_service_time'] = patient.timestamps[end_key] - patient.timestamps[start_key]
-            else:
-                data[f'{key}_service_time'] = 0
-        patient_data.append(data)
-    
-    df_patients = pd.DataFrame(patient_data)
-    
-    # Calculate KPIs
+# Resources reported in the KPIs
+UTILIZATION_RESOURCES = ['doctor', 'nurse', 'bed', 'specialist', 'operating_room', 'lab', 'imaging_center', 'medical_equipment']
+
+def patient_frame(hospital):
+    """Builds the per-patient wait and service time table column-wise.
+
+    Wait and service columns are NaN for stages the patient skipped.
+    """
+    df = hospital.patients.to_frame()
+    frame = df[['patient_id', 'patient_type', 'severity_level', 'arrival_time']].copy()
+    frame['total_time_in_system'] = df['discharge_time'] - df['arrival_time']
+    for key in STAGES:
+        frame[f'{key}_wait_time'] = df[f'{key}_wait']
+        frame[f'{key}_service_time'] = df[f'{key}_end'] - df[f'{key}_start']
+    return frame
+
+class AnalysisResult:
+    """KPIs of one simulation run, computed once and rendered by every front end.
+
+    Means follow the original report and count skipped stages as zero;
+    maxima and percentiles of a stage cover only patients who reached it.
+    """
+
+    def __init__(self, patients, utilization):
+        import pandas as pd
+        self.patients = patients
+        self.utilization = utilization
+        self.count = len(patients)
+
+        total_time = patients['total_time_in_system']
+        self.total_time = {'mean': total_time.mean(), 'max': total_time.max()}
+        for q, value in zip(PERCENTILES, total_time.quantile([q / 100 for q in PERCENTILES])):
+            self.total_time[f'p{q}'] = value
+
+        # One row per stage
+        wait_cols = [f'{key}_wait_time' for key in STAGES]
+        service_cols = [f'{key}_service_time' for key in STAGES]
+        waits = patients[wait_cols]
+        self.stages = pd.DataFrame({
+            'patients': waits.count().to_numpy(),
+            'wait_mean': waits.fillna(0).mean().to_numpy(),
+            'wait_max': waits.fillna(0).max().to_numpy(),
+            'service_mean': patients[service_cols].fillna(0).mean().to_numpy(),
+        }, index=list(STAGES))
+        quantiles = waits.quantile([q / 100 for q in PERCENTILES])
+        for q, (_, row) in zip(PERCENTILES, quantiles.iterrows()):
+            self.stages[f'wait_p{q}'] = row.to_numpy()
+
+        # Breakdowns: mean total time and mean stage waits of the patients in each group
+        group_cols = ['total_time_in_system'] + wait_cols
+        self.by_type = patients.groupby('patient_type', observed=False)[group_cols].mean().reindex(list(TYPE_NAMES))
+        self.by_severity = patients.groupby('severity_level')[group_cols].mean().reindex(list(SEVERITY_LEVELS))
+
+    def compact(self):
+        """Copy of the result whose patient table keeps only total time in system.
+
+        Every KPI and table is already computed, and the front ends only
+        plot the total time histogram, so this is what gets cached.
+        """
+        import copy
+        compact = copy.copy(self)
+        compact.patients = self.patients[['total_time_in_system']]
+        return compact
+
+    def kpis(self):
+        """Flattens the result into {name: float}, e.g. for batch summaries."""
+        nan = float('nan')
+        empty = self.count == 0
+        kpis = {'patients': self.count}
+        for name, value in self.total_time.items():
+            kpis[f'total_time_{name}'] = nan if empty else float(value)
+        for key, row in self.stages.iterrows():
+            for name, value in row.items():
+                if name != 'patients':
+                    kpis[f'{key}_{name}'] = nan if empty else float(value)
+        for name, stats in self.utilization.items():
+            kpis[f'{name}_utilization'] = stats['utilization']
+        kpis['preemptions'] = sum(stats['preemptions'] for stats in self.utilization.values())
+        for patient_type, row in self.by_type.iterrows():
+            kpis[f'total_time_mean_{patient_type}'] = float(row['total_time_in_system'])
+        for level, row in self.by_severity.iterrows():
+            kpis[f'total_time_mean_severity_{level}'] = float(row['total_time_in_system'])
+            for key in STAGES:
+                kpis[f'{key}_wait_mean_severity_{level}'] = float(row[f'{key}_wait_time'])
+        return kpis
+
+    def report_lines(self):
+        """Returns the text report shared by the CLI and the Tk GUI."""
+        lines = ["", "Performance Metrics:"]
+        lines.append("Average Total Time in System: {:.2f} minutes".format(self.total_time['mean']))
+        lines.append("Average Waiting Times:")
+        for key in STAGES:
+            lines.append(f"  {key.title()}: {self.stages.at[key, 'wait_mean']:.2f} minutes")
+        lines.append("Average Service Times:")
+        for key in STAGES:
+            lines.append(f"  {key.title()}: {self.stages.at[key, 'service_mean']:.2f} minutes")
+
+        lines.append("")
+        lines.append("Average Resource Utilization:")
+        for resource in UTILIZATION_RESOURCES:
+            utilization = self.utilization[resource]['utilization'] * 100
+            lines.append(f"  {resource.title().replace('_', ' ')}: {utilization:.2f}%")
+
+        lines.append("")
+        lines.append("Bottleneck Analysis:")
+        for key in STAGES:
+            lines.append(f"  Maximum {key.title()} Wait Time: {self.stages.at[key, 'wait_max']:.2f} minutes")
+
+        percentile_names = [f'wait_p{q}' for q in PERCENTILES]
+        lines.append("")
+        lines.append("Total Time in System Percentiles: " + ", ".join(
+            f"P{q} {self.total_time[f'p{q}']:.2f}" for q in PERCENTILES) + " minutes")
+        lines.append("Wait Time Percentiles (patients reaching the stage):")
+        for key in STAGES:
+            values = ", ".join(f"P{q} {self.stages.at[key, name]:.2f}" for q, name in zip(PERCENTILES, percentile_names))
+            lines.append(f"  {key.title()}: {values} minutes")
+
+        lines.append("")
+        lines.append("Average Total Time by Patient Type:")
+        for patient_type, row in self.by_type.iterrows():
+            lines.append(f"  {patient_type.title()}: {row['total_time_in_system']:.2f} minutes")
+        lines.append("Average Total Time by Severity:")
+        for level, row in self.by_severity.iterrows():
+            lines.append(f"  Severity {level}: {row['total_time_in_system']:.2f} minutes")
+        return lines
+
+    def report(self):
+        print("\n".join(self.report_lines()))
+
+def analyze(hospital):
+    """Computes every KPI of a finished run in one vectorized pass."""
+    return AnalysisResult(patient_frame(hospital), hospital.utilization.summary())
+
+def summarize(hospital):
+    """Returns the KPIs of analyze as a flat dict of floats.
+
+    The summary is small and picklable, so batch workers return it instead
+    of the whole Hospital. In online statistics mode it is read from the
+    streaming accumulators instead.
+    """
+    if hospital.patients is None:
+        return hospital.online.kpis(hospital.utilization.summary())
+    return analyze(hospital).kpis()
+
+def report_kpis(kpis):
+    """Prints the headline KPIs from a flat KPI dict (online statistics mode, the CLI)."""
     print("\nPerformance Metrics:")
-    print("Average Total Time in System: {:.2f} minutes".format(df_patients['total_time_in_system'].mean()))
-    print("Average Waiting Times:")
-    wait_time_cols = [col for col in df_patients.columns if 'wait_time' in col]
-    for col in wait_time_cols:
-        avg_wait = df_patients[col].mean()
-        print(f"  {col.replace('_wait_time', '').title()}: {avg_wait:.2f} minutes")
-    print("Average Service Times:")
-    service_time_cols = [col for col in df_patients.columns if 'service_time' in col]
-    for col in service_time_cols:
-        avg_service = df_patients[col].mean()
-        print(f"  {col.replace('_service_time', '').title()}: {avg_service:.2f} minutes")
-    
-    # Resource Utilization
-    df_resources = pd.DataFrame(hospital.resource_log)
-    avg_utilization = df_resources.mean()
+    print("Average Total Time in System: {:.2f} minutes".format(kpis['total_time_mean']))
+    print("Total Time in System Percentiles: " + ", ".join(
+        f"P{q} {kpis[f'total_time_p{q}']:.2f}" for q in PERCENTILES) + " minutes")
+    print("Waiting Times (mean / max / P95):")
+    for key in STAGES:
+        print(f"  {key.title()}: {kpis[f'{key}_wait_mean']:.2f} / {kpis[f'{key}_wait_max']:.2f} / {kpis[f'{key}_wait_p95']:.2f} minutes")
     print("\nAverage Resource Utilization:")
-    for resource in ['doctor', 'nurse', 'bed', 'specialist', 'operating_room', 'lab', 'imaging_center', 'medical_equipment']:
-        utilization = avg_utilization[f'{resource}_utilization'] * 100
-        print(f"  {resource.title().replace('_', ' ')}: {utilization:.2f}%")
-    
-    # Bottleneck Identification
-    print("\nBottleneck Analysis:")
-    max_wait_time_cols = df_patients[wait_time_cols].max()
-    for col in wait_time_cols:
-        max_wait = max_wait_time_cols[col]
-        print(f"  Maximum {col.replace('_wait_time', '').title()} Wait Time: {max_wait:.2f} minutes")
-    
-    # Visualizations
-    # Plot resource utilization over time
+    for resource in UTILIZATION_RESOURCES:
+        print(f"  {resource.title().replace('_', ' ')}: {kpis[f'{resource}_utilization'] * 100:.2f}%")
+
+def plot_results(result, resource_log):
+    """Plots utilization over time and the total time in system histogram."""
+    # Plotting backends are only loaded when plots are asked for
+    import pandas as pd
+    import matplotlib.pyplot as plt
+    # Plot resource utilization over time (sampled on demand)
+    df_resources = pd.DataFrame(resource_log)
     plt.figure(figsize=(10, 6))
     for resource in ['doctor', 'nurse', 'bed']:
         plt.plot(df_resources['time'], df_resources[f'{resource}_utilization'], label=f'{resource.title()}')
@@ -71,8 +181,18 @@ def analyze_data(hospital):
     
     # Histogram of total time in system
     plt.figure(figsize=(8, 5))
-    plt.hist(df_patients['total_time_in_system'], bins=20, edgecolor='black')
+    plt.hist(result.patients['total_time_in_system'], bins=20, edgecolor='black')
     plt.xlabel('Total Time in System (minutes)')
     plt.ylabel('Number of Patients')
     plt.title('Distribution of Total Time in System')
-    plt.show()
\ No newline at end of file
+    plt.show()
+
+def analyze_data(hospital):
+    """Analyzes collected data and generates reports."""
+    if hospital.patients is None:
+        # Online statistics mode keeps no per-patient data to plot
+        report_kpis(summarize(hospital))
+        return
+    result = analyze(hospital)
+    result.report()
+    plot_results(result, hospital.resource_log)
\ No newline at end of file
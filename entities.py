@@ -1,16 +1,29 @@
 # entities.py
 
-import random
+
+# Patient stages, in the order their wait/start/end times are stored
+STAGES = ('registration', 'triage', 'diagnostics', 'surgery', 'treatment', 'recovery')
+REGISTRATION, TRIAGE, DIAGNOSTICS, SURGERY, TREATMENT, RECOVERY = range(len(STAGES))
+SEVERITY_LEVELS = (1, 2, 3, 4, 5)
+NAN = float('nan')
 
 class Patient:
-    """Represents a patient with various attributes."""
-    def __init__(self, patient_id, patient_type, severity_level, arrival_time):
+    """Represents a patient with various attributes.
+
+    rng is the random stream the attributes are drawn from, normally
+    hospital.streams.patients, so a patient never touches global state.
+    """
+    __slots__ = ('patient_id', 'patient_type', 'severity_level', 'age', 'gender', 'medical_history',
+                 'arrival_time', 'needs_surgery', 'needs_diagnostics', 'code_blue', 'discharge_time', 'times',
+                 'service_times')
+
+    def __init__(self, patient_id, patient_type, severity_level, arrival_time, rng):
         self.patient_id = patient_id
         self.patient_type = patient_type  # 'emergency', 'scheduled', 'walk-in'
         self.severity_level = severity_level  # 1 (low) to 5 (high)
-        self.age = random.randint(1, 100)
-        self.gender = random.choice(['Male', 'Female'])
-        self.medical_history = random.choice(['None', 'Chronic Illness', 'Previous Surgery'])
+        self.age = rng.randint(1, 100)
+        self.gender = rng.choice(['Male', 'Female'])
+        self.medical_history = rng.choice(['None', 'Chronic Illness', 'Previous Surgery'])
         self.arrival_time = arrival_time
 
         # Determine if the patient needs surgery or diagnostics
@@ -23,40 +36,47 @@ class Patient:
 
         # Code blue status
         self.code_blue = False
-        if self.patient_type == 'emergency' and random.random() < 0.1:
+        if self.patient_type == 'emergency' and rng.random() < 0.1:
             self.code_blue = True
 
-        # Metrics
-        self.timestamps = {}  # Dictionary to store timestamps of each process
-
-class StaffMember:
-    """Represents a staff member with shifts and breaks."""
-    def __init__(self, env, role, name, shift_duration, break_duration):
-        self.env = env
-        self.role = role
-        self.name = name
-        self.shift_duration = shift_duration
-        self.break_duration = break_duration
-        self.is_available = True
-        self.action = env.process(self.work())
-
-    def work(self):
-        while True:
-            # Work shift
-            shift_end = self.env.now + self.shift_duration
-            while self.env.now < shift_end:
-                # Take a break at a random time during the shift
-                break_time = self.env.now + random.randint(60, self.shift_duration - 60)
-                yield self.env.timeout(break_time - self.env.now)
-                self.is_available = False
-                print(f'{self.role} {self.name} is on break at {self.env.now:.2f}')
-                yield self.env.timeout(self.break_duration)
-                self.is_available = True
-                print(f'{self.role} {self.name} returns from break at {self.env.now:.2f}')
-            # Shift over
-            self.is_available = False
-            print(f'{self.role} {self.name} ends shift at {self.env.now:.2f}')
-            # Hand over to next shift (simulate handover time)
-            yield self.env.timeout(5)
-            self.is_available = True
-            print(f'{self.role} {self.name} starts new shift at {self.env.now:.2f}')
\ No newline at end of file
+        # Metrics: wait, start and end of every stage (NaN if never reached)
+        self.discharge_time = NAN
+        self.times = [NAN] * (3 * len(STAGES))
+        # Logged service times by stage index, set by trace replay (see replay.py)
+        self.service_times = None
+
+    @property
+    def priority(self):
+        """Queue priority (lower is served first): 1 for severity 5 down to 5 for severity 1.
+
+        0 is reserved for code blue.
+        """
+        return 6 - self.severity_level
+
+    def begin(self, stage, requested_at, now):
+        """Records the wait and start time of a stage."""
+        self.times[3 * stage] = now - requested_at
+        self.times[3 * stage + 1] = now
+
+    def finish(self, stage, now):
+        """Records the end time of a stage."""
+        self.times[3 * stage + 2] = now
+
+    def service_time(self, stage):
+        """Logged service time of a stage, or None if it is to be sampled."""
+        if self.service_times is None:
+            return None
+        return self.service_times.get(stage)
+
+    @property
+    def timestamps(self):
+        """Dict view of the recorded times, keyed like '<stage>_wait'."""
+        timestamps = {'arrival': self.arrival_time}
+        for i, stage in enumerate(STAGES):
+            for j, suffix in enumerate(('wait', 'start', 'end')):
+                value = self.times[3 * i + j]
+                if value == value:
+                    timestamps[f'{stage}_{suffix}'] = value
+        if self.discharge_time == self.discharge_time:
+            timestamps['discharge'] = self.discharge_time
+        return timestamps
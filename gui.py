@@ -1,169 +1,216 @@
 # gui.py
 
-import tkinter as tk
-from tkinter import ttk
-import simpy
-import random
-import pandas as pd
-import matplotlib.pyplot as plt
-from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+# Tk, matplotlib, seaborn and pandas are imported when the window is built,
+# so importing this module (e.g. for simulation_worker) stays cheap
+import queue
 import threading
-import seaborn as sns
-from hospital import Hospital
-from processes import patient_arrivals
-
-def run_simulation(config):
-    def simulation_thread():
-        global hospital, env  # Declare hospital as global
-        random.seed(config['RANDOM_SEED'])
-        env = simpy.Environment()
-        hospital = Hospital(env, config)
-        env.process(patient_arrivals(env, hospital, config))
-        simulate()
-
-def simulate():
+from simulation import build_simulation
+from cache import ResultCache, analysis_entry, cache_key
+
+# Resources drawn in the live utilization plot
+LIVE_RESOURCES = ['doctor', 'nurse', 'bed']
+# Simulated minutes run per slice by the worker thread
+SLICE_MINUTES = 10
+# The UI drains progress and redraws at most this often
+FRAME_MS = 100
+
+def simulation_worker(config, updates, result_cache):
+    """Runs the simulation off the UI thread in env.run slices.
+
+    After each slice a compact progress record is posted to updates: the
+    slice end time and the mean utilization of LIVE_RESOURCES over the
+    slice. The finished analysis is posted (and cached) at the end, or
+    ('error', message) if the run fails.
+    """
     try:
-        env.step()
-        # Schedule the next simulation step
-        root.after(1, simulate)
-    except simpy.core.EmptySchedule:
-        # Simulation completed
-        output_text.insert(tk.END, 'Simulation completed.\n')
-        analyze_data_tkinter(hospital)
-        #env.run(until=config['SIM_TIME'])
-        # Schedule GUI updates in the main thread
-        #root.after(0, lambda: output_text.insert(tk.END, 'Simulation completed.\n'))
-        #root.after(0, analyze_data_tkinter, hospital)
-    #threading.Thread(target=simulation_thread).start()
-
-#def update_gui_callback():
-    root.after(0, update_plots)
-
-def update_plots():
-    # Clear the axes
-    ax.clear()
-    # Extract data
-    times = [entry['time'] for entry in hospital.resource_log]
-    doctor_utilization = [entry.get('doctor_utilization', 0) for entry in hospital.resource_log]
-    nurse_utilization = [entry.get('nurse_utilization', 0) for entry in hospital.resource_log]
-    bed_utilization = [entry.get('bed_utilization', 0) for entry in hospital.resource_log]
-    # Plot data
-    ax.plot(times, doctor_utilization, label='Doctors')
-    ax.plot(times, nurse_utilization, label='Nurses')
-    ax.plot(times, bed_utilization, label='Beds')
-    ax.set_xlabel('Time (minutes)')
-    ax.set_ylabel('Utilization')
-    ax.set_title('Resource Utilization Over Time')
-    ax.legend()
-    ax.set_ylim(0, 1)
-    canvas.draw()
-
-def start_simulation():
-    config = {
-        'NUM_DOCTORS': int(doctors_entry.get()),
-        'NUM_NURSES': int(nurses_entry.get()),
-        'NUM_BEDS': int(beds_entry.get()),
-        'NUM_SPECIALISTS': 2,
-        'NUM_ADMIN_STAFF': 3,
-        'NUM_SUPPORT_STAFF': 4,
-        'NUM_OPERATING_ROOMS': 1,
-        'NUM_LABS': 2,
-        'NUM_IMAGING_CENTERS': 1,
-        'NUM_MEDICAL_EQUIPMENT': 5,
-        'SHIFT_DURATION': 240,
-        'BREAK_DURATION': 15,
-        'SIM_TIME': int(sim_time_entry.get()),
-        'RANDOM_SEED': int(random_seed_entry.get()),
-    }
-    output_text.insert(tk.END, 'Running simulation...\n')
-    run_simulation(config)
-
-def analyze_data_tkinter(hospital):
-    patient_data = []
-    for patient in hospital.patients:
-        data = {
-            'patient_id': patient.patient_id,
-            'patient_type': patient.patient_type,
-            'severity_level': patient.severity_level,
-            'arrival_time': patient.arrival_time,
-            'total_time_in_system': patient.timestamps['discharge'] - patient.arrival_time
+        env, hospital = build_simulation(config)
+        resources = [hospital.utilization.resources[name] for name in LIVE_RESOURCES]
+        previous = [resource.areas() for resource in resources]
+        sim_time = hospital.config['SIM_TIME']
+        while env.now < sim_time:
+            env.run(until=min(sim_time, env.now + SLICE_MINUTES))
+            point = {}
+            for i, (name, resource) in enumerate(zip(LIVE_RESOURCES, resources)):
+                areas = resource.areas()
+                busy = areas[0] - previous[i][0]
+                capacity = areas[2] - previous[i][2]
+                point[name] = busy / capacity if capacity > 0 else 0.0
+                previous[i] = areas
+            updates.put(('progress', env.now, point))
+        result = analysis_entry(hospital)
+        result_cache.put(cache_key(config, kind='analysis'), result)
+        updates.put(('done', result))
+    except Exception as exc:
+        updates.put(('error', str(exc)))
+
+class SimulationWindow:
+    """The Tk window: inputs, a live utilization plot and the final report."""
+
+    def __init__(self, root):
+        import tkinter as tk
+        import matplotlib.pyplot as plt
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        self.tk = tk
+        self.root = root
+        self.result_cache = ResultCache()
+        self.updates = queue.Queue()
+        root.title("Healthcare Logistics Simulation Tool")
+
+        # Create input fields
+        self.doctors_entry = self.entry(0, "Number of Doctors:", "3")
+        self.nurses_entry = self.entry(1, "Number of Nurses:", "5")
+        self.beds_entry = self.entry(2, "Number of Beds:", "10")
+        self.sim_time_entry = self.entry(3, "Simulation Time (minutes):", "480")
+        self.random_seed_entry = self.entry(4, "Random Seed:", "42")
+
+        # Start button
+        self.start_button = tk.Button(root, text="Run Simulation", command=self.start_simulation)
+        self.start_button.grid(row=5, column=0, columnspan=2)
+
+        # Output text area
+        self.output_text = tk.Text(root, height=10, width=80)
+        self.output_text.grid(row=6, column=0, columnspan=2)
+
+        # Matplotlib Figure for real-time monitoring
+        fig, self.ax = plt.subplots(figsize=(8, 4))
+        self.live_times = []
+        self.live_values = {name: [] for name in LIVE_RESOURCES}
+        # Line artists are created once and updated in place with set_data
+        self.lines = {name: self.ax.plot([], [], label=f'{name.title()}s')[0] for name in LIVE_RESOURCES}
+        self.ax.set_xlabel('Time (minutes)')
+        self.ax.set_ylabel('Utilization')
+        self.ax.set_title('Resource Utilization Over Time')
+        self.ax.legend()
+        self.ax.set_ylim(0, 1)
+        self.canvas = FigureCanvasTkAgg(fig, master=root)
+        self.canvas.draw()
+        self.canvas.get_tk_widget().grid(row=7, column=0, columnspan=2)
+
+    def entry(self, row, label, default):
+        self.tk.Label(self.root, text=label).grid(row=row, column=0)
+        entry = self.tk.Entry(self.root)
+        entry.insert(0, default)
+        entry.grid(row=row, column=1)
+        return entry
+
+    def start_simulation(self):
+        config = {
+            'NUM_DOCTORS': int(self.doctors_entry.get()),
+            'NUM_NURSES': int(self.nurses_entry.get()),
+            'NUM_BEDS': int(self.beds_entry.get()),
+            'NUM_SPECIALISTS': 2,
+            'NUM_ADMIN_STAFF': 3,
+            'NUM_SUPPORT_STAFF': 4,
+            'NUM_OPERATING_ROOMS': 1,
+            'NUM_LABS': 2,
+            'NUM_IMAGING_CENTERS': 1,
+            'NUM_MEDICAL_EQUIPMENT': 5,
+            'SHIFT_DURATION': 240,
+            'BREAK_DURATION': 15,
+            'SIM_TIME': int(self.sim_time_entry.get()),
+            'RANDOM_SEED': int(self.random_seed_entry.get()),
         }
-        for key in ['registration', 'triage', 'diagnostics', 'surgery', 'treatment', 'recovery']:
-            wait_key = f'{key}_wait'
-            start_key = f'{key}_start'
-            end_key = f'{key}_end'
-            data[f'{key}_wait_time'] = patient.timestamps.get(wait_key, 0)
-            if start_key in patient.timestamps and end_key in patient.timestamps:
-                data[f'{key}_service_time'] = patient.timestamps[end_key] - patient.timestamps[start_key]
+        # Same entry as the CLI and Streamlit app use for this config and seed
+        cached = self.result_cache.get(cache_key(config, kind='analysis'))
+        if cached is not None:
+            self.output_text.insert(self.tk.END, 'Loaded cached results.\n')
+            result, resource_log = cached
+            self.reset_plot(config['SIM_TIME'])
+            self.live_times.extend(resource_log['time'])
+            for name in LIVE_RESOURCES:
+                self.live_values[name].extend(resource_log[f'{name}_utilization'])
+            self.update_plots()
+            self.analyze_data_tkinter(result, resource_log)
+            return
+        self.output_text.insert(self.tk.END, 'Running simulation...\n')
+        self.run_simulation(config)
+
+    def run_simulation(self, config):
+        """Starts a worker thread and the throttled UI polling loop."""
+        self.reset_plot(config['SIM_TIME'])
+        self.start_button.config(state=self.tk.DISABLED)
+        threading.Thread(target=simulation_worker, args=(config, self.updates, self.result_cache),
+                         daemon=True).start()
+        self.root.after(FRAME_MS, self.poll_updates)
+
+    def poll_updates(self):
+        """Drains every queued progress record, then redraws once."""
+        done = None
+        changed = False
+        while True:
+            try:
+                message = self.updates.get_nowait()
+            except queue.Empty:
+                break
+            if message[0] == 'progress':
+                _, time, point = message
+                self.live_times.append(time)
+                for name in LIVE_RESOURCES:
+                    self.live_values[name].append(point[name])
+                changed = True
             else:
-                data[f'{key}_service_time'] = 0
-        patient_data.append(data)
-    
-    df_patients = pd.DataFrame(patient_data)
-    avg_total_time = df_patients['total_time_in_system'].mean()
-    output_text.insert(tk.END, f"\nAverage Total Time in System: {avg_total_time:.2f} minutes\n")
-    
-    # Histogram of total time in system
-    fig2, ax2 = plt.subplots(figsize=(5, 4))
-    ax2.hist(df_patients['total_time_in_system'], bins=20, edgecolor='black')
-    ax2.set_xlabel('Total Time in System (minutes)')
-    ax2.set_ylabel('Number of Patients')
-    ax2.set_title('Distribution of Total Time in System')
-    canvas2 = FigureCanvasTkAgg(fig2, master=root)
-    canvas2.draw()
-    canvas2.get_tk_widget().grid(row=8, column=0, columnspan=2)
-    
-    # Heatmap of resource utilization
-    df_resources = pd.DataFrame(hospital.resource_log)
-    fig3, ax3 = plt.subplots(figsize=(5, 4))
-    sns.heatmap(df_resources.drop('time', axis=1).T, ax=ax3)
-    ax3.set_title('Resource Utilization Heatmap')
-    canvas3 = FigureCanvasTkAgg(fig3, master=root)
-    canvas3.draw()
-    canvas3.get_tk_widget().grid(row=9, column=0, columnspan=2)
-
-# Create the main window
-root = tk.Tk()
-root.title("Healthcare Logistics Simulation Tool")
-
-# Create input fields
-tk.Label(root, text="Number of Doctors:").grid(row=0, column=0)
-doctors_entry = tk.Entry(root)
-doctors_entry.insert(0, "3")
-doctors_entry.grid(row=0, column=1)
-
-tk.Label(root, text="Number of Nurses:").grid(row=1, column=0)
-nurses_entry = tk.Entry(root)
-nurses_entry.insert(0, "5")
-nurses_entry.grid(row=1, column=1)
-
-tk.Label(root, text="Number of Beds:").grid(row=2, column=0)
-beds_entry = tk.Entry(root)
-beds_entry.insert(0, "10")
-beds_entry.grid(row=2, column=1)
-
-tk.Label(root, text="Simulation Time (minutes):").grid(row=3, column=0)
-sim_time_entry = tk.Entry(root)
-sim_time_entry.insert(0, "480")
-sim_time_entry.grid(row=3, column=1)
-
-tk.Label(root, text="Random Seed:").grid(row=4, column=0)
-random_seed_entry = tk.Entry(root)
-random_seed_entry.insert(0, "42")
-random_seed_entry.grid(row=4, column=1)
-
-# Start button
-start_button = tk.Button(root, text="Run Simulation", command=start_simulation)
-start_button.grid(row=5, column=0, columnspan=2)
-
-# Output text area
-output_text = tk.Text(root, height=10, width=80)
-output_text.grid(row=6, column=0, columnspan=2)
-
-# Matplotlib Figure for real-time monitoring
-fig, ax = plt.subplots(figsize=(8, 4))
-canvas = FigureCanvasTkAgg(fig, master=root)
-canvas.draw()
-canvas.get_tk_widget().grid(row=7, column=0, columnspan=2)
-
-root.mainloop()
\ No newline at end of file
+                done = message
+        if changed:
+            self.update_plots()
+        if done is None:
+            self.root.after(FRAME_MS, self.poll_updates)
+            return
+        self.start_button.config(state=self.tk.NORMAL)
+        if done[0] == 'error':
+            self.output_text.insert(self.tk.END, f'Simulation failed: {done[1]}\n')
+            return
+        self.output_text.insert(self.tk.END, 'Simulation completed.\n')
+        self.analyze_data_tkinter(*done[1])
+
+    def reset_plot(self, sim_time):
+        """Empties the live lines and fixes the axes for a new run."""
+        self.live_times.clear()
+        for name in LIVE_RESOURCES:
+            self.live_values[name].clear()
+            self.lines[name].set_data([], [])
+        self.ax.set_xlim(0, sim_time)
+        self.canvas.draw_idle()
+
+    def update_plots(self):
+        """Pushes the accumulated points into the existing line artists."""
+        for name in LIVE_RESOURCES:
+            self.lines[name].set_data(self.live_times, self.live_values[name])
+        self.canvas.draw_idle()
+
+    def analyze_data_tkinter(self, result, resource_log):
+        import pandas as pd
+        import matplotlib.pyplot as plt
+        import seaborn as sns
+        from matplotlib.backends.backend_tkagg import FigureCanvasTkAgg
+        df_patients = result.patients
+        self.output_text.insert(self.tk.END, "\n".join(result.report_lines()) + "\n")
+
+        # Histogram of total time in system
+        fig2, ax2 = plt.subplots(figsize=(5, 4))
+        ax2.hist(df_patients['total_time_in_system'], bins=20, edgecolor='black')
+        ax2.set_xlabel('Total Time in System (minutes)')
+        ax2.set_ylabel('Number of Patients')
+        ax2.set_title('Distribution of Total Time in System')
+        canvas2 = FigureCanvasTkAgg(fig2, master=self.root)
+        canvas2.draw()
+        canvas2.get_tk_widget().grid(row=8, column=0, columnspan=2)
+
+        # Heatmap of resource utilization
+        df_resources = pd.DataFrame(resource_log)
+        fig3, ax3 = plt.subplots(figsize=(5, 4))
+        # Only the utilization columns; queue lengths are on another scale
+        sns.heatmap(df_resources.filter(like='_utilization').T, ax=ax3)
+        ax3.set_title('Resource Utilization Heatmap')
+        canvas3 = FigureCanvasTkAgg(fig3, master=self.root)
+        canvas3.draw()
+        canvas3.get_tk_widget().grid(row=9, column=0, columnspan=2)
+
+def main():
+    import tkinter as tk
+    # Create the main window
+    root = tk.Tk()
+    SimulationWindow(root)
+    root.mainloop()
+
+if __name__ == '__main__':
+    main()
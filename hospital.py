@@ -1,114 +1,236 @@
 # hospital.py
 
-import random
-import simpy
-from simpy.resources.resource import PriorityResource
-from entities import StaffMember, Patient
+from entities import Patient, STAGES, REGISTRATION, TRIAGE, DIAGNOSTICS, SURGERY, TREATMENT, RECOVERY
 from processes import patient_process
+from monitoring import UtilizationTracker
+from patient_store import PatientStore
+from online_stats import OnlineKPIs
+from tracing import NULL_TRACER
+from rng import RandomStreams
+from roster import staff_rosters, shift_schedule
+
+# Config keys that set the capacity of each resource
+CAPACITY_KEYS = {
+    'NUM_DOCTORS': 'doctor',
+    'NUM_NURSES': 'nurse',
+    'NUM_SPECIALISTS': 'specialist',
+    'NUM_ADMIN_STAFF': 'admin_staff',
+    'NUM_SUPPORT_STAFF': 'support_staff',
+    'NUM_BEDS': 'bed',
+    'NUM_OPERATING_ROOMS': 'operating_room',
+    'NUM_LABS': 'lab',
+    'NUM_IMAGING_CENTERS': 'imaging_center',
+    'NUM_MEDICAL_EQUIPMENT': 'medical_equipment',
+}
+PREEMPTION_MODES = ('off', 'resume', 'restart')
+# Uniform integer service times (minutes); treatment also scales with severity
+SERVICE_TIME_RANGES = {
+    REGISTRATION: (1, 5),
+    TRIAGE: (5, 10),
+    DIAGNOSTICS: (10, 30),
+    SURGERY: (30, 90),
+    TREATMENT: (15, 45),
+    RECOVERY: (30, 60),
+}
 
 class Hospital:
     """Manages hospital resources and processes."""
 
-    def __init__(self, env, config):
+    def __init__(self, env, config, tracer=None, streams=None):
         self.env = env
         self.config = config
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+        # Named random streams; never the global random module
+        if streams is None:
+            streams = RandomStreams(config['RANDOM_SEED'], vectorized=config.get('VECTORIZED_SAMPLING', False))
+        self.streams = streams
         
-        # Staff resources
-        self.doctor = PriorityResource(env, capacity=config['NUM_DOCTORS'])
-        self.nurse = PriorityResource(env, capacity=config['NUM_NURSES'])
-        self.specialist = PriorityResource(env, capacity=config['NUM_SPECIALISTS'])
-        self.admin_staff = PriorityResource(env, capacity=config['NUM_ADMIN_STAFF'])
-        self.support_staff = PriorityResource(env, capacity=config['NUM_SUPPORT_STAFF'])
-        
-        # Facility resources
-        self.bed = PriorityResource(env, capacity=config['NUM_BEDS'])
-        self.operating_room = PriorityResource(env, capacity=config['NUM_OPERATING_ROOMS'])
-        self.lab = PriorityResource(env, capacity=config['NUM_LABS'])
-        self.imaging_center = PriorityResource(env, capacity=config['NUM_IMAGING_CENTERS'])
-        
-        # Equipment resources
-        self.medical_equipment = PriorityResource(env, capacity=config['NUM_MEDICAL_EQUIPMENT'])
-        
+        # 'full' keeps every discharged patient, 'online' only streaming
+        # accumulators (constant memory), 'both' keeps both
+        self.stats_mode = config.get('STATS_MODE', 'full')
+        if self.stats_mode not in ('full', 'online', 'both'):
+            raise ValueError(f"Unknown STATS_MODE: {self.stats_mode}")
+
+        # Resource utilization is tracked per grant/release, not by polling;
+        # the change history is kept unless asked otherwise or stats are online
+        keep_history = config.get('UTILIZATION_HISTORY')
+        if keep_history is None or keep_history == 'auto':
+            keep_history = self.stats_mode != 'online'
+        self.utilization = UtilizationTracker(env, keep_history=keep_history)
+
+        # 'resume' or 'restart': what a patient does after losing a preemptive resource
+        self.preemption = config.get('PREEMPTION', 'off')
+        if self.preemption not in PREEMPTION_MODES:
+            raise ValueError(f"Unknown PREEMPTION: {self.preemption}")
+        self.preemptions = []  # (time, patient id, stage, resource, remaining minutes)
+
         # Initialize resources and staff
         self.initialize_resources()
         self.initialize_staff()
 
         # Data collection
-        self.patients = []  # List to store all patient objects for analysis
-        self.resource_log = []  # Log for resource utilization
+        self.patients = PatientStore() if self.stats_mode != 'online' else None  # Columnar store of discharged patients
+        self.online = OnlineKPIs() if self.stats_mode != 'full' else None  # Streaming KPI accumulators
+
+        # Statistics cover only patients arriving after the warm-up period;
+        # 'auto' must be resolved beforehand (see warmup.resolve_warmup)
+        self.warmup_time = config.get('WARMUP_TIME', 0)
+        if self.warmup_time == 'auto':
+            raise ValueError("WARMUP_TIME='auto' must be resolved with warmup.resolve_warmup before creating the Hospital")
 
         # Start data collection after initialization
         env.process(self.monitor_patient_influx())
-        env.process(self.collect_resource_utilization())
+        if self.warmup_time > 0:
+            env.process(self.end_warmup())
+
+    @property
+    def resource_log(self):
+        """Utilization log sampled on demand from the tracker's change points."""
+        return self.utilization.sample(self.config.get('UTILIZATION_RESOLUTION', 1))
+
     def initialize_resources(self):
         """Initializes hospital resources based on the configuration."""
+        # Doctors, operating rooms and beds can be taken over when PREEMPTION is on
+        preemptive = self.preemption != 'off'
         # Staff resources
-        self.doctor = simpy.PriorityResource(self.env, capacity=self.config['NUM_DOCTORS'])
-        self.nurse = simpy.PriorityResource(self.env, capacity=self.config['NUM_NURSES'])
-        self.specialist = simpy.PriorityResource(self.env, capacity=self.config['NUM_SPECIALISTS'])
-        self.admin_staff = simpy.PriorityResource(self.env, capacity=self.config['NUM_ADMIN_STAFF'])
-        self.support_staff = simpy.PriorityResource(self.env, capacity=self.config['NUM_SUPPORT_STAFF'])
+        self.doctor = self.utilization.resource('doctor', self.config['NUM_DOCTORS'], preemptive)
+        self.nurse = self.utilization.resource('nurse', self.config['NUM_NURSES'])
+        self.specialist = self.utilization.resource('specialist', self.config['NUM_SPECIALISTS'])
+        self.admin_staff = self.utilization.resource('admin_staff', self.config['NUM_ADMIN_STAFF'])
+        self.support_staff = self.utilization.resource('support_staff', self.config['NUM_SUPPORT_STAFF'])
     
         # Facility resources
-        self.bed = simpy.PriorityResource(self.env, capacity=self.config['NUM_BEDS'])
-        self.operating_room = simpy.PriorityResource(self.env, capacity=self.config['NUM_OPERATING_ROOMS'])
-        self.lab = simpy.PriorityResource(self.env, capacity=self.config['NUM_LABS'])
-        self.imaging_center = simpy.PriorityResource(self.env, capacity=self.config['NUM_IMAGING_CENTERS'])
+        self.bed = self.utilization.resource('bed', self.config['NUM_BEDS'], preemptive)
+        self.operating_room = self.utilization.resource('operating_room', self.config['NUM_OPERATING_ROOMS'], preemptive)
+        self.lab = self.utilization.resource('lab', self.config['NUM_LABS'])
+        self.imaging_center = self.utilization.resource('imaging_center', self.config['NUM_IMAGING_CENTERS'])
         
         # Equipment resources
-        self.medical_equipment = simpy.PriorityResource(self.env, capacity=self.config['NUM_MEDICAL_EQUIPMENT'])
+        self.medical_equipment = self.utilization.resource('medical_equipment', self.config['NUM_MEDICAL_EQUIPMENT'])
     
+    def set_capacity(self, key, capacity):
+        """Changes a resource's capacity mid-run, e.g. set_capacity('NUM_DOCTORS', 5).
+
+        A rostered pool gets the new headcount through its roster, so the
+        next shift change does not restore the old one: breaks are rostered
+        as for the original headcount, and a pool with an explicit
+        STAFF_SCHEDULES entry is held at capacity from then on.
+        """
+        if key not in CAPACITY_KEYS:
+            raise ValueError(f"{key} is not a resource capacity; expected one of {', '.join(CAPACITY_KEYS)}")
+        roster = self.rosters.get(key)
+        if roster is None:
+            self.utilization.resources[CAPACITY_KEYS[key]].set_capacity(capacity)
+        elif key in (self.config.get('STAFF_SCHEDULES') or {}):
+            roster.set_schedule([(0, capacity)], roster.period)
+        else:
+            roster.set_schedule(shift_schedule(capacity, self.config['SHIFT_DURATION'], self.config['BREAK_DURATION']),
+                                roster.period)
+
+    def state(self):
+        """Describes the current state: capacity, users and queue per resource."""
+        resources = {}
+        for name, resource in self.utilization.resources.items():
+            resources[name] = {
+                'capacity': resource.capacity,
+                'in_use': len(resource.users),
+                'queued': len(resource.put_queue),
+                'queued_priorities': sorted(request.priority for request in resource.put_queue),
+            }
+        if self.patients is not None:
+            discharged = len(self.patients)
+        else:
+            discharged = self.online.count
+        return {'time': self.env.now, 'discharged': discharged, 'resources': resources}
+
     def initialize_staff(self):
-        """Initializes staff members based on the configuration."""
-        c = self.config
-        self.doctors = [StaffMember(self.env, 'Doctor', f'Doctor_{i+1}', c['SHIFT_DURATION'], c['BREAK_DURATION']) for i in range(c['NUM_DOCTORS'])]
-        self.nurses = [StaffMember(self.env, 'Nurse', f'Nurse_{i+1}', c['SHIFT_DURATION'], c['BREAK_DURATION']) for i in range(c['NUM_NURSES'])]
-        self.specialists = [StaffMember(self.env, 'Specialist', f'Specialist_{i+1}', c['SHIFT_DURATION'], c['BREAK_DURATION']) for i in range(c['NUM_SPECIALISTS'])]
-        self.admin_staff_members = [StaffMember(self.env, 'AdminStaff', f'Admin_{i+1}', c['SHIFT_DURATION'], c['BREAK_DURATION']) for i in range(c['NUM_ADMIN_STAFF'])]
-        self.support_staff_members = [StaffMember(self.env, 'SupportStaff', f'Support_{i+1}', c['SHIFT_DURATION'], c['BREAK_DURATION']) for i in range(c['NUM_SUPPORT_STAFF'])]
-
-    def registration(self, patient):
+        """Starts one roster process per staffed pool.
+
+        Shifts and breaks change the pool's capacity (see roster.py);
+        STAFF_MODEL='fixed' keeps every pool at its full headcount.
+        """
+        staff_model = self.config.get('STAFF_MODEL', 'roster')
+        if staff_model not in ('roster', 'fixed'):
+            raise ValueError(f"Unknown STAFF_MODEL: {staff_model}")
+        self.rosters = staff_rosters(self.env, self, self.config, self.tracer) if staff_model == 'roster' else {}
+
+    def end_warmup(self):
+        """Restarts utilization statistics once the warm-up period is over."""
+        yield self.env.timeout(self.warmup_time)
+        self.utilization.reset()
+
+    def discharge(self, patient):
+        """Records a discharged patient in the configured statistics collectors."""
+        if patient.arrival_time < self.warmup_time:
+            return
+        if self.patients is not None:
+            self.patients.append(patient)
+        if self.online is not None:
+            self.online.add(patient)
+
+    def service_time(self, patient, stage):
+        """Service time of a stage: the patient's logged time, else a fresh draw."""
+        duration = patient.service_time(stage)
+        if duration is not None:
+            return duration
+        if stage == TREATMENT:
+            base_treatment_time = self.streams.service.randint(15, 45)
+            severity_factor = (6 - patient.severity_level)
+            return base_treatment_time * severity_factor / 5
+        return self.streams.service.randint(*SERVICE_TIME_RANGES[stage])
+
+    # Stage services; duration, when given, replaces the drawn service time
+    # (the rest of a stage resumed after preemption).
+    def registration(self, patient, duration=None):
         """Registration process conducted by administrative staff and nurse."""
-        registration_time = random.randint(1, 5)
-        yield self.env.timeout(registration_time)
+        yield self.env.timeout(self.service_time(patient, REGISTRATION) if duration is None else duration)
     
-    def triage(self, patient):
+    def triage(self, patient, duration=None):
         """Triage process conducted by a nurse."""
-        triage_time = random.randint(5, 10)
-        yield self.env.timeout(triage_time)
+        yield self.env.timeout(self.service_time(patient, TRIAGE) if duration is None else duration)
 
-    def diagnostics(self, patient):
+    def diagnostics(self, patient, duration=None):
         """Diagnostics process conducted in lab or imaging center."""
-        diagnostics_time = random.randint(10, 30)
-        yield self.env.timeout(diagnostics_time)
+        yield self.env.timeout(self.service_time(patient, DIAGNOSTICS) if duration is None else duration)
 
-    def surgery(self, patient):
+    def surgery(self, patient, duration=None):
         """Surgery process conducted by a specialist in operating room."""
-        surgery_time = random.randint(30, 90)
-        yield self.env.timeout(surgery_time)
+        yield self.env.timeout(self.service_time(patient, SURGERY) if duration is None else duration)
 
-    def treatment(self, patient):
+    def treatment(self, patient, duration=None):
         """Treatment process conducted by a doctor."""
-        base_treatment_time = random.randint(15, 45)
-        severity_factor = (6 - patient.severity_level)
-        treatment_time = base_treatment_time * severity_factor / 5
-        yield self.env.timeout(treatment_time)
+        yield self.env.timeout(self.service_time(patient, TREATMENT) if duration is None else duration)
+
+    def recovery(self, patient, duration=None):
+        """Post-surgery recovery in a bed."""
+        yield self.env.timeout(self.service_time(patient, RECOVERY) if duration is None else duration)
+
+    def record_preemption(self, patient, stage, resource, remaining):
+        """Logs that patient lost resource during stage with remaining minutes of service left."""
+        self.preemptions.append((self.env.now, patient.patient_id, STAGES[stage], resource.name, remaining))
+        if self.tracer.patient:
+            self.tracer.emit(self.env.now, 'patient', patient.patient_id, 'preempted', resource.name)
 
     def code_blue_response(self, patient):
         """Handles code blue emergency situations."""
-        print(f'Code Blue! Patient {patient.patient_id} requires immediate attention at {self.env.now:.2f}')
-        response_time = random.randint(5, 15)
+        tracer = self.tracer
+        if tracer.emergency:
+            tracer.emit(self.env.now, 'emergency', patient.patient_id, 'code_blue', 'doctor')
+        response_time = self.streams.service.randint(5, 15)
         yield self.env.timeout(response_time)
-        print(f'Patient {patient.patient_id} stabilized after Code Blue at {self.env.now:.2f}')
+        if tracer.emergency:
+            tracer.emit(self.env.now, 'emergency', patient.patient_id, 'stabilized', 'doctor')
 
     def disaster_response(self):
         """Simulates a disaster scenario with sudden influx of patients."""
-        print(f'Disaster occurred at {self.env.now:.2f}! Sudden influx of patients.')
-        num_additional_patients = random.randint(5, 15)
+        if self.tracer.emergency:
+            self.tracer.emit(self.env.now, 'emergency', 'hospital', 'disaster')
+        rng = self.streams.disasters
+        num_additional_patients = rng.randint(5, 15)
         for _ in range(num_additional_patients):
-            patient_id = 'D' + str(random.randint(1000, 9999))
-            severity_level = random.randint(3, 5)
-            patient = Patient(patient_id, 'emergency', severity_level, self.env.now)
+            patient_id = 'D' + str(rng.randint(1000, 9999))
+            severity_level = rng.randint(3, 5)
+            patient = Patient(patient_id, 'emergency', severity_level, self.env.now, self.streams.patients)
             self.env.process(patient_process(self.env, patient, self))
         yield self.env.timeout(0)
 
@@ -116,25 +238,5 @@ class Hospital:
         """Monitors patient influx and triggers disaster response if needed."""
         while True:
             yield self.env.timeout(60)
-            if random.random() < 0.05:
+            if self.streams.disasters.random() < self.config.get('DISASTER_PROBABILITY', 0.05):
                 yield self.env.process(self.disaster_response())
-
-    def collect_resource_utilization(self):
-        """Collects data on resource utilization at each time step."""
-        while True:
-            # Record the utilization of each resource
-            utilization = {
-                'time': self.env.now,
-                'doctor_utilization': self.doctor.count / self.config['NUM_DOCTORS'],
-                'nurse_utilization': self.nurse.count / self.config['NUM_NURSES'],
-                'bed_utilization': self.bed.count / self.config['NUM_BEDS'],
-                # ... (other resources)
-            }
-            # Debugging: Print the utilization dictionary
-            print(f'Collecting utilization at time {self.env.now}: {utilization}')
-            
-            self.resource_log.append(utilization)
-            # Schedule GUI update in main thread
-            #if self.update_gui_callback:
-            #    self.update_gui_callback()
-        yield self.env.timeout(1)  # Collect data every 1 minute
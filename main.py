@@ -1,36 +1,154 @@
 # main.py
 
-import simpy
-import random
 import argparse
-from hospital import Hospital
-from processes import patient_arrivals
-from data_analysis import analyze_data
-
-def main():
-    """Runs the simulation and performs data analysis."""
-    # Parse command-line arguments
-    parser = argparse.ArgumentParser(description='Healthcare Logistics Simulation Tool')
-    parser.add_argument('--doctors', type=int, help='Number of doctors')
-    parser.add_argument('--nurses', type=int, help='Number of nurses')
-    # ... (other arguments)
-    args = parser.parse_args()
-
-    # If arguments are not provided, prompt the user
-    if args.doctors is None:
-        args.doctors = int(input('Enter the number of doctors: '))
-    if args.nurses is None:
-        args.nurses = int(input('Enter the number of nurses: '))
-    # ... (prompt for other parameters as needed)
+import csv
+import json
+import math
+import os
+import sys
+from simulation import DEFAULT_CONFIG, run_simulation
+from cache import ResultCache, run_analysis, run_summary
+from batch import run_batch
+from data_analysis import summarize, report_kpis, plot_results
+from tracing import Tracer, JSONLSink, DEBUG
+
+# Short aliases kept from the original CLI
+ALIASES = {'NUM_DOCTORS': '--doctors', 'NUM_NURSES': '--nurses'}
+OUTPUT_FORMATS = ('csv', 'json', 'parquet')
+
+
+def option_name(key):
+    """Command-line flag of a config key, e.g. NUM_DOCTORS -> --num-doctors."""
+    return '--' + key.lower().replace('_', '-')
+
+
+def parse_value(text):
+    """Parses a command-line config value: int, float, bool or string (e.g. 'auto')."""
+    for convert in (int, float):
+        try:
+            return convert(text)
+        except ValueError:
+            pass
+    if text.lower() in ('true', 'false'):
+        return text.lower() == 'true'
+    return text
+
+
+def load_scenario(path):
+    """Reads a scenario file (JSON, or YAML if PyYAML is installed) of config overrides."""
+    with open(path, encoding='utf-8') as f:
+        if path.endswith(('.yaml', '.yml')):
+            import yaml
+            scenario = yaml.safe_load(f)
+        else:
+            scenario = json.load(f)
+    if not isinstance(scenario, dict):
+        raise ValueError(f'{path}: a scenario must map config keys to values')
+    return scenario
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(
+        description='Healthcare Logistics Simulation Tool',
+        epilog='Config values are taken from the defaults, then --scenario, then the options above.')
+    config_group = parser.add_argument_group('scenario configuration')
+    for key, default in DEFAULT_CONFIG.items():
+        flags = [option_name(key)]
+        if key in ALIASES:
+            flags.append(ALIASES[key])
+        config_group.add_argument(*flags, dest=key, type=parse_value, metavar='VALUE',
+                                  help=f'{key} (default {default})')
+    parser.add_argument('--scenario', help='JSON or YAML file of config overrides')
+    parser.add_argument('--replications', type=int, default=1, help='Number of independent replications')
+    parser.add_argument('--workers', type=int, help='Worker processes for replications (default: all cores)')
+    parser.add_argument('--seed', type=int, help='Seed of a single run, or base seed of the replications')
+    parser.add_argument('--output', help='Write the KPIs to this file (.csv, .json or .parquet)')
+    parser.add_argument('--format', choices=OUTPUT_FORMATS, help='Output format if not given by the extension')
+    parser.add_argument('--plot', action='store_true', help='Show the utilization and total time plots (single run)')
+    parser.add_argument('--trace', metavar='FILE', help='Write a JSONL event trace of a single run')
+    parser.add_argument('--no-cache', action='store_true', help='Always re-run instead of reusing cached results')
+    parser.add_argument('--quiet', action='store_true', help='Do not print the report')
+    return parser
+
+
+def write_results(path, summaries, config, fmt):
+    """Writes one row of KPIs per replication as CSV, JSON or Parquet."""
+    if fmt == 'json':
+        # Strict JSON has no NaN, so missing values become null
+        rows = [{k: None if isinstance(v, float) and math.isnan(v) else v for k, v in s.items()} for s in summaries]
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump({'config': config, 'replications': rows}, f, indent=2)
+    elif fmt == 'csv':
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            writer = csv.DictWriter(f, fieldnames=list(summaries[0]))
+            writer.writeheader()
+            writer.writerows(summaries)
+    else:
+        import pandas as pd
+        pd.DataFrame(summaries).to_parquet(path, index=False)
+
+
+def main(argv=None):
+    """Runs the simulation headlessly; never prompts."""
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.replications < 1:
+        parser.error('--replications must be at least 1')
+    if args.replications > 1 and (args.plot or args.trace):
+        parser.error('--plot and --trace need a single replication')
+    output_format = args.format
+    if args.output and output_format is None:
+        output_format = os.path.splitext(args.output)[1].lstrip('.').lower()
+        if output_format not in OUTPUT_FORMATS:
+            parser.error(f'cannot tell the output format of {args.output}; use --format')
 
     # Simulation configuration
-    config = {
-        'NUM_DOCTORS': args.doctors,
-        'NUM_NURSES': args.nurses,
-        # ... (rest of the configuration)
-    }
+    config = dict(DEFAULT_CONFIG)
+    if args.scenario:
+        try:
+            config.update(load_scenario(args.scenario))
+        except (OSError, ValueError, ImportError) as e:
+            parser.error(f'cannot read scenario: {e}')
+    for key in DEFAULT_CONFIG:
+        value = getattr(args, key)
+        if value is not None:
+            config[key] = value
+    if args.plot and config['STATS_MODE'] == 'online':
+        parser.error("--plot needs per-patient data; use STATS_MODE 'full' or 'both'")
+    if args.plot and config['UTILIZATION_HISTORY'] is False:
+        parser.error('--plot needs the utilization history; drop UTILIZATION_HISTORY false')
+
+    # Repeated runs of the same scenario are read back from the result cache
+    cache = None if args.no_cache else ResultCache()
+    seed = args.seed
+    if args.replications > 1:
+        batch = run_batch(config, args.replications, workers=args.workers, base_seed=seed, cache=cache)
+        summaries = batch.summaries
+        if not args.quiet:
+            batch.report()
+    else:
+        if args.trace:
+            with Tracer(JSONLSink(args.trace), level=DEBUG) as tracer:
+                summary = summarize(run_simulation(config, seed=seed, tracer=tracer))
+        elif args.plot:
+            result, resource_log = run_analysis(config, seed=seed, cache=cache)
+            summary = result.kpis()
+        else:
+            summary = dict(run_summary(config, seed=seed, cache=cache))
+        summary['seed'] = config['RANDOM_SEED'] if seed is None else seed
+        summaries = [summary]
+        if not args.quiet:
+            report_kpis(summary)
+        if args.plot:
+            plot_results(result, resource_log)
+
+    if args.output:
+        try:
+            write_results(args.output, summaries, config, output_format)
+        except (OSError, ValueError, ImportError) as e:
+            parser.error(f'cannot write results: {e}')
+    return 0
 
-    # ... (rest of the main function remains the same)
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    sys.exit(main())
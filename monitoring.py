@@ -0,0 +1,368 @@
+# monitoring.py
+
+from array import array
+from bisect import bisect_left, insort
+from operator import attrgetter
+from simpy.events import Event
+from simpy.resources.resource import PriorityResource, Preempted
+
+# Every resource owned by the Hospital, in reporting order
+RESOURCE_NAMES = [
+    'doctor', 'nurse', 'specialist', 'admin_staff', 'support_staff',
+    'bed', 'operating_room', 'lab', 'imaging_center', 'medical_equipment',
+]
+
+# Times a waiting bundle may be passed over by requests queued behind it
+# before its resources hold free servers for it
+BUNDLE_BYPASS_LIMIT = 10
+
+_request_key = attrgetter('key')
+
+
+class KeyedQueue(list):
+    """List of requests kept sorted by request key with bisect.
+
+    Replaces simpy's SortedQueue, which re-sorts the whole list on every
+    append; requests with equal keys keep their arrival order.
+    """
+
+    def __init__(self, maxlen=None):
+        super().__init__()
+        self.maxlen = maxlen
+
+    def append(self, item):
+        if self.maxlen is not None and len(self) >= self.maxlen:
+            raise RuntimeError('Cannot append event. Queue is full.')
+        insort(self, item, key=_request_key)
+
+    def discard(self, item):
+        """Removes item, found by bisecting on its key."""
+        index = bisect_left(self, item.key, key=_request_key)
+        while self[index] is not item:
+            index += 1
+        del self[index]
+
+
+class MonitoredResource(PriorityResource):
+    """PriorityResource that keeps time-weighted busy, queue and capacity integrals.
+
+    The integrals are updated whenever the resource grants, queues or
+    releases a request or changes capacity, so the cost is O(1) per event
+    regardless of how long the simulation runs.
+    """
+
+    PutQueue = KeyedQueue
+    preemptive = False
+
+    def __init__(self, env, capacity=1, name=None, keep_history=True):
+        super().__init__(env, capacity)
+        self.name = name
+        self.keep_history = keep_history
+        self.reset()
+
+    def reset(self):
+        """Discards accumulated statistics and starts integrating from now."""
+        now = self._env.now
+        self.start_time = now
+        self._last_time = now
+        self._busy = len(self.users)
+        self._queued = len(self.put_queue)
+        self._recorded_capacity = max(self._capacity, self._busy)
+        self.busy_area = 0.0
+        self.queue_area = 0.0
+        self.capacity_area = 0.0
+        self.max_queue = self._queued
+        self.preemptions = 0
+        # Change points (time, busy, queued, capacity) used to build sampled series
+        self.history_time = array('d', [now])
+        self.history_busy = array('l', [self._busy])
+        self.history_queue = array('l', [self._queued])
+        self.history_capacity = array('l', [self._recorded_capacity])
+
+    def _observe(self, force=False):
+        """Integrates the previous state up to now and records the new one."""
+        busy = len(self.users)
+        queued = len(self.put_queue)
+        if busy == self._busy and queued == self._queued and not force:
+            return
+        now = self._env.now
+        elapsed = now - self._last_time
+        self.busy_area += elapsed * self._busy
+        self.queue_area += elapsed * self._queued
+        self.capacity_area += elapsed * self._recorded_capacity
+        self._last_time = now
+        self._busy = busy
+        self._queued = queued
+        # Staff finishing a patient after their break was due are still on duty
+        self._recorded_capacity = capacity = max(self._capacity, busy)
+        if queued > self.max_queue:
+            self.max_queue = queued
+        if self.keep_history:
+            self.history_time.append(now)
+            self.history_busy.append(busy)
+            self.history_queue.append(queued)
+            self.history_capacity.append(capacity)
+
+    def _trigger_put(self, get_event):
+        # New requests, releases and capacity changes all pass through here.
+        # Waiting requests are tried in priority order while a server is free
+        # (or a preempting request could make one); a bundle still waiting for
+        # another of its resources is passed over, at most BUNDLE_BYPASS_LIMIT
+        # times, after which free servers are held for it.
+        queue = self.put_queue
+        passed = None
+        index = 0
+        while index < len(queue):
+            request = queue[index]
+            if len(self.users) >= self._capacity and not (request.preempt and self.preemptive):
+                break
+            if isinstance(request, BundleRequest):
+                granted = request.try_grant()
+                if not granted:
+                    if request.bypasses >= BUNDLE_BYPASS_LIMIT:
+                        break
+                    if passed is None:
+                        passed = []
+                    passed.append(request)
+            else:
+                self._do_put(request)
+                granted = request.triggered
+                if granted:
+                    del queue[index]
+            if not granted:
+                index += 1
+            elif passed:
+                for bundle in passed:
+                    bundle.bypasses += 1
+        self._observe()
+
+    def _trigger_get(self, put_event):
+        # Releases remove the user synchronously in _trigger_get
+        super()._trigger_get(put_event)
+        self._observe()
+
+    def set_capacity(self, capacity):
+        """Changes the number of servers from now on.
+
+        Added servers take waiting requests at once. When capacity drops,
+        requests in service finish normally and nothing new starts until
+        fewer than capacity are in use.
+        """
+        if capacity <= 0:
+            raise ValueError('"capacity" must be > 0.')
+        self._capacity = capacity
+        self._trigger_put(None)
+        self._observe(force=True)
+
+    def areas(self, now=None):
+        """Returns (busy_area, queue_area, capacity_area, elapsed) integrated up to now."""
+        if now is None:
+            now = self._env.now
+        elapsed = now - self._last_time
+        return (self.busy_area + elapsed * self._busy,
+                self.queue_area + elapsed * self._queued,
+                self.capacity_area + elapsed * self._recorded_capacity,
+                now - self.start_time)
+
+    def utilization(self, now=None):
+        """Time-weighted busy servers over time-weighted capacity."""
+        busy_area, _, capacity_area, duration = self.areas(now)
+        if duration <= 0:
+            return self._busy / self.capacity
+        return busy_area / capacity_area
+
+    def mean_queue(self, now=None):
+        """Time-weighted mean number of waiting requests."""
+        _, queue_area, _, duration = self.areas(now)
+        if duration <= 0:
+            return float(self._queued)
+        return queue_area / duration
+
+
+class PreemptiveMonitoredResource(MonitoredResource):
+    """MonitoredResource on which preempt=True requests can take a server.
+
+    Same contract as simpy's PreemptiveResource: the displaced user's
+    process gets an Interrupt whose cause is a Preempted. Users are kept
+    sorted by request key, so the least important ones are at the end of
+    the list instead of being found with max() on every request.
+    """
+
+    preemptive = True
+
+    def __init__(self, env, capacity=1, name=None, keep_history=True):
+        super().__init__(env, capacity, name=name, keep_history=keep_history)
+        self.users = KeyedQueue()
+
+    def displaceable(self, event):
+        """Number of users event must displace to get a server (0 if one is free),
+        or None if they do not all rank below it."""
+        users = self.users
+        # More than one only while a roster has cut capacity below the users
+        excess = len(users) - self._capacity + 1
+        if excess <= 0:
+            return 0
+        return excess if users[-excess].key > event.key else None
+
+    def preempt(self, event, count):
+        """Interrupts the count least important users in favour of event."""
+        users = self.users
+        victims = users[-count:]
+        del users[-count:]
+        self.preemptions += count
+        for victim in victims:
+            victim.proc.interrupt(Preempted(by=event.proc, usage_since=victim.usage_since, resource=self))
+
+    def _do_put(self, event):
+        if event.preempt:
+            count = self.displaceable(event)
+            if count:
+                self.preempt(event, count)
+        return super()._do_put(event)
+
+
+class BundleRequest(Event):
+    """Request for several resources that are granted all at once.
+
+    The bundle takes one entry, ordered by priority like any request, in
+    the queue of each resource it needs, and is granted as soon as every
+    one of them has a free server (after preemption, if preempt is set and
+    the resources allow it). Resources try their waiting requests in
+    priority order, so a bundle is passed over only while it still waits
+    for another resource: a patient never holds a bed idle while waiting
+    for a doctor. Lower-priority requests granted past a waiting bundle
+    are counted in bypasses; after BUNDLE_BYPASS_LIMIT of them its
+    resources keep free servers idle for it, so a steady stream of
+    single-resource requests cannot starve it. Release it with
+    release(); the bundle itself is the user of each resource, so
+    preemption takes back a single resource.
+    """
+
+    def __init__(self, env, resources, priority=0, preempt=False):
+        super().__init__(env)
+        self.resources = resources
+        self.priority = priority
+        self.preempt = preempt
+        self.time = env.now
+        self.key = (priority, self.time, not preempt)
+        self.proc = env.active_process
+        self.usage_since = None
+        self.bypasses = 0
+        for resource in resources:
+            resource.put_queue.append(self)
+        if not self.try_grant():
+            for resource in resources:
+                resource._observe()
+
+    def try_grant(self):
+        """Grants every resource if the bundle can have them all now; returns whether it did."""
+        displace = []
+        for resource in self.resources:
+            if len(resource.users) < resource._capacity:
+                continue
+            count = resource.displaceable(self) if self.preempt and resource.preemptive else None
+            if not count:
+                return False
+            displace.append((resource, count))
+        for resource, count in displace:
+            resource.preempt(self, count)
+        self.usage_since = self.env.now
+        for resource in self.resources:
+            resource.put_queue.discard(self)
+            resource.users.append(self)
+            resource._observe()
+        self.succeed()
+        return True
+
+    def cancel(self):
+        """Withdraws the bundle if it has not been granted yet."""
+        if not self.triggered:
+            for resource in self.resources:
+                resource.put_queue.discard(self)
+                resource._observe()
+
+    def release(self):
+        """Releases every resource the bundle still holds."""
+        for resource in self.resources:
+            resource.release(self)
+
+
+class UtilizationTracker:
+    """Owns the monitored resources of a hospital and reports on them."""
+
+    def __init__(self, env, keep_history=True):
+        self.env = env
+        self.keep_history = keep_history
+        self.resources = {}
+
+    def resource(self, name, capacity, preemptive=False):
+        """Creates and registers a monitored resource."""
+        kind = PreemptiveMonitoredResource if preemptive else MonitoredResource
+        resource = kind(self.env, capacity, name=name, keep_history=self.keep_history)
+        self.resources[name] = resource
+        return resource
+
+    def reset(self):
+        """Restarts statistics collection on every resource, e.g. after warm-up."""
+        for resource in self.resources.values():
+            resource.reset()
+
+    def summary(self):
+        """Returns exact time-weighted statistics for every resource."""
+        now = self.env.now
+        return {
+            name: {
+                'utilization': resource.utilization(now),
+                'mean_queue': resource.mean_queue(now),
+                'max_queue': resource.max_queue,
+                'preemptions': resource.preemptions,
+            }
+            for name, resource in self.resources.items()
+        }
+
+    def series(self, resolution=1.0, until=None):
+        """Columnar utilization series: {'time': array, '<name>_utilization': array}.
+
+        The samples of sample() without the queue columns, as arrays of
+        doubles, which pickle compactly (e.g. into the result cache).
+        """
+        log = self.sample(resolution, until)
+        series = {'time': array('d', [entry['time'] for entry in log])}
+        for name in self.resources:
+            column = f'{name}_utilization'
+            series[column] = array('d', [entry[column] for entry in log])
+        return series
+
+    def sample(self, resolution=1.0, until=None):
+        """Builds a sampled utilization log at the given resolution.
+
+        Each entry holds the instantaneous utilization and queue length of
+        every resource at that time, in the same shape as the old per-minute
+        resource log. Requires keep_history.
+        """
+        if not self.keep_history:
+            raise RuntimeError('Utilization history is disabled; only summary() is available.')
+        if until is None:
+            until = self.env.now
+        resources = list(self.resources.items())
+        if not resources:
+            return []
+        start = max(resource.start_time for _, resource in resources)
+        steps = int((until - start) / resolution) + 1 if until >= start else 0
+        times = [start + i * resolution for i in range(steps)]
+        log = [{'time': t} for t in times]
+        for name, resource in resources:
+            history_time = resource.history_time
+            history_busy = resource.history_busy
+            history_queue = resource.history_queue
+            history_capacity = resource.history_capacity
+            last = len(history_time) - 1
+            idx = 0
+            for entry in log:
+                t = entry['time']
+                # Advance to the last change point at or before t
+                while idx < last and history_time[idx + 1] <= t:
+                    idx += 1
+                entry[f'{name}_utilization'] = history_busy[idx] / history_capacity[idx]
+                entry[f'{name}_queue'] = history_queue[idx]
+        return log
@@ -0,0 +1,190 @@
+# online_stats.py
+
+import math
+from entities import STAGES, SEVERITY_LEVELS
+from patient_store import TYPE_NAMES
+
+# Percentiles reported for total time and stage waits
+PERCENTILES = (50, 90, 95)
+NAN = float('nan')
+
+
+class Welford:
+    """Running count, mean, variance and maximum in O(1) memory."""
+
+    __slots__ = ('count', 'mean', 'm2', 'max')
+
+    def __init__(self):
+        self.count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.max = -math.inf
+
+    def add(self, x):
+        self.count += 1
+        delta = x - self.mean
+        self.mean += delta / self.count
+        self.m2 += delta * (x - self.mean)
+        if x > self.max:
+            self.max = x
+
+    @property
+    def variance(self):
+        return self.m2 / (self.count - 1) if self.count > 1 else NAN
+
+    def value(self):
+        """Mean, or NaN before the first observation."""
+        return self.mean if self.count else NAN
+
+
+class P2Quantile:
+    """Streaming quantile estimate using the P-square algorithm (Jain & Chlamtac).
+
+    Keeps five markers regardless of how many observations are added.
+    """
+
+    __slots__ = ('p', 'count', 'heights', 'positions', 'desired', 'increments')
+
+    def __init__(self, p):
+        self.p = p
+        self.count = 0
+        self.heights = []
+        self.positions = [1, 2, 3, 4, 5]
+        self.desired = [1, 1 + 2 * p, 1 + 4 * p, 3 + 2 * p, 5]
+        self.increments = [0, p / 2, p, (1 + p) / 2, 1]
+
+    def add(self, x):
+        self.count += 1
+        q = self.heights
+        if self.count <= 5:
+            q.append(x)
+            if self.count == 5:
+                q.sort()
+            return
+        n = self.positions
+        if x < q[0]:
+            q[0] = x
+            k = 0
+        elif x >= q[4]:
+            q[4] = x
+            k = 3
+        else:
+            k = 0
+            while x >= q[k + 1]:
+                k += 1
+        for i in range(k + 1, 5):
+            n[i] += 1
+        desired = self.desired
+        for i, increment in enumerate(self.increments):
+            desired[i] += increment
+        for i in (1, 2, 3):
+            d = desired[i] - n[i]
+            if (d >= 1 and n[i + 1] - n[i] > 1) or (d <= -1 and n[i - 1] - n[i] < -1):
+                d = 1 if d > 0 else -1
+                # Piecewise-parabolic prediction, falling back to linear
+                candidate = q[i] + d / (n[i + 1] - n[i - 1]) * (
+                    (n[i] - n[i - 1] + d) * (q[i + 1] - q[i]) / (n[i + 1] - n[i])
+                    + (n[i + 1] - n[i] - d) * (q[i] - q[i - 1]) / (n[i] - n[i - 1]))
+                if not q[i - 1] < candidate < q[i + 1]:
+                    candidate = q[i] + d * (q[i + d] - q[i]) / (n[i + d] - n[i])
+                q[i] = candidate
+                n[i] += d
+
+    def value(self):
+        """Current estimate; exact (linear interpolation) for five or fewer points."""
+        if self.count == 0:
+            return NAN
+        if self.count > 5:
+            return self.heights[2]
+        ordered = sorted(self.heights)
+        position = self.p * (len(ordered) - 1)
+        lower = int(position)
+        upper = min(lower + 1, len(ordered) - 1)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+
+class StreamSummary:
+    """Welford moments, running maximum and P-square percentiles of one stream."""
+
+    __slots__ = ('moments', 'quantiles')
+
+    def __init__(self, percentiles=PERCENTILES):
+        self.moments = Welford()
+        self.quantiles = [P2Quantile(q / 100) for q in percentiles]
+
+    def add(self, x):
+        self.moments.add(x)
+        for quantile in self.quantiles:
+            quantile.add(x)
+
+
+class OnlineKPIs:
+    """Constant-memory accumulators for the KPIs of analyze_data.
+
+    Updated once per discharged patient, so no patient needs to be kept.
+    kpis() returns the same keys as AnalysisResult.kpis(), with means
+    counting skipped stages as zero and maxima/percentiles covering only
+    patients who reached the stage.
+    """
+
+    def __init__(self, percentiles=PERCENTILES):
+        self.percentiles = percentiles
+        self.count = 0
+        self.total_time = StreamSummary(percentiles)
+        self.waits = [StreamSummary(percentiles) for _ in STAGES]
+        self.services = [Welford() for _ in STAGES]
+        self.total_time_by_type = {patient_type: Welford() for patient_type in TYPE_NAMES}
+        self.total_time_by_severity = {level: Welford() for level in SEVERITY_LEVELS}
+        self.waits_by_severity = {level: [Welford() for _ in STAGES] for level in SEVERITY_LEVELS}
+
+    def add(self, patient):
+        """Folds one discharged patient into the accumulators."""
+        self.count += 1
+        total_time = patient.discharge_time - patient.arrival_time
+        self.total_time.add(total_time)
+        self.total_time_by_type[patient.patient_type].add(total_time)
+        level = patient.severity_level
+        self.total_time_by_severity[level].add(total_time)
+        waits_by_severity = self.waits_by_severity[level]
+        times = patient.times
+        for i in range(len(STAGES)):
+            wait = times[3 * i]
+            if wait == wait:
+                self.waits[i].add(wait)
+                waits_by_severity[i].add(wait)
+                end = times[3 * i + 2]
+                if end == end:
+                    self.services[i].add(end - times[3 * i + 1])
+
+    def kpis(self, utilization):
+        """Returns the flat KPI dict; utilization is UtilizationTracker.summary()."""
+        count = self.count
+        kpis = {'patients': count}
+        if count:
+            kpis['total_time_mean'] = self.total_time.moments.mean
+            kpis['total_time_max'] = self.total_time.moments.max
+        else:
+            kpis['total_time_mean'] = kpis['total_time_max'] = NAN
+        for q, quantile in zip(self.percentiles, self.total_time.quantiles):
+            kpis[f'total_time_p{q}'] = quantile.value()
+        for i, key in enumerate(STAGES):
+            wait = self.waits[i].moments
+            service = self.services[i]
+            if count:
+                kpis[f'{key}_wait_mean'] = wait.mean * wait.count / count
+                kpis[f'{key}_wait_max'] = wait.max if wait.count else 0.0
+                kpis[f'{key}_service_mean'] = service.mean * service.count / count
+            else:
+                kpis[f'{key}_wait_mean'] = kpis[f'{key}_wait_max'] = kpis[f'{key}_service_mean'] = NAN
+            for q, quantile in zip(self.percentiles, self.waits[i].quantiles):
+                kpis[f'{key}_wait_p{q}'] = quantile.value()
+        for name, stats in utilization.items():
+            kpis[f'{name}_utilization'] = stats['utilization']
+        kpis['preemptions'] = sum(stats['preemptions'] for stats in utilization.values())
+        for patient_type, accumulator in self.total_time_by_type.items():
+            kpis[f'total_time_mean_{patient_type}'] = accumulator.value()
+        for level in SEVERITY_LEVELS:
+            kpis[f'total_time_mean_severity_{level}'] = self.total_time_by_severity[level].value()
+            for i, key in enumerate(STAGES):
+                kpis[f'{key}_wait_mean_severity_{level}'] = self.waits_by_severity[level][i].value()
+        return kpis
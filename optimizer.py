@@ -0,0 +1,185 @@
+# optimizer.py
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from batch import run_replication, confidence_interval
+from rng import replication_seeds
+from sweep import grid_design
+
+# Cost of one unit of each resource over the simulated horizon
+DEFAULT_COSTS = {
+    'NUM_DOCTORS': 1200,
+    'NUM_NURSES': 500,
+    'NUM_SPECIALISTS': 1600,
+    'NUM_BEDS': 150,
+    'NUM_OPERATING_ROOMS': 2000,
+}
+# Comparison operators accepted in constraints
+CONSTRAINT_OPS = ('<', '<=', '>', '>=')
+
+
+def config_cost(config, costs):
+    """Total cost of the resource mix in config."""
+    return sum(config[key] * unit_cost for key, unit_cost in costs.items())
+
+
+def _violation(mean, op, threshold):
+    """How far mean is on the wrong side of the constraint (0 if satisfied)."""
+    if math.isnan(mean):
+        return math.inf
+    if op in ('<', '<='):
+        return max(0.0, mean - threshold)
+    return max(0.0, threshold - mean)
+
+
+def _clearly_infeasible(mean, half_width, op, threshold):
+    """True if the whole confidence interval violates the constraint."""
+    if math.isnan(mean) or math.isinf(half_width):
+        return False
+    if op in ('<', '<='):
+        return mean - half_width > threshold
+    return mean + half_width < threshold
+
+
+def _clearly_feasible(mean, half_width, op, threshold):
+    """True if the whole confidence interval satisfies the constraint."""
+    if math.isnan(mean) or math.isinf(half_width):
+        return False
+    if op in ('<', '<='):
+        return mean + half_width < threshold
+    return mean - half_width > threshold
+
+
+class Candidate:
+    """One resource mix under evaluation."""
+
+    def __init__(self, overrides, cost):
+        self.overrides = overrides
+        self.cost = cost
+        self.summaries = []
+        self.intervals = {}
+        self.violation = math.inf
+
+    def evaluate(self, constraints, confidence):
+        """Recomputes intervals and the total constraint violation."""
+        self.intervals = {
+            kpi: confidence_interval([summary[kpi] for summary in self.summaries], confidence)
+            for kpi, _, _ in constraints
+        }
+        self.violation = sum(_violation(self.intervals[kpi][0], op, threshold) for kpi, op, threshold in constraints)
+
+    def clearly_infeasible(self, constraints):
+        return any(_clearly_infeasible(*self.intervals[kpi], op, threshold) for kpi, op, threshold in constraints)
+
+    def clearly_feasible(self, constraints):
+        return all(_clearly_feasible(*self.intervals[kpi], op, threshold) for kpi, op, threshold in constraints)
+
+
+class OptimizationResult:
+    """Cheapest configuration found and the history of the search."""
+
+    def __init__(self, best, config, rounds):
+        self.best = best
+        self.config = config
+        self.rounds = rounds
+
+    def report(self):
+        for entry in self.rounds:
+            print(f"Round {entry['round']}: {entry['candidates']} candidates, "
+                  f"{entry['replications']} replications x {entry['sim_time']} minutes, "
+                  f"{entry['dropped']} dropped as clearly infeasible")
+        if self.best is None:
+            print("\nNo configuration met the targets.")
+            return
+        print(f"\nCheapest configuration meeting the targets (cost {self.best.cost:.0f}):")
+        for key, value in self.best.overrides.items():
+            print(f"  {key}: {value}")
+        for kpi, (mean, half_width) in self.best.intervals.items():
+            print(f"  {kpi}: {mean:.2f} ± {half_width:.2f}")
+
+
+def optimize_staffing(base_config, space, constraints, costs=None, initial_replications=3,
+                      final_replications=20, initial_sim_time=None, eta=2, confidence=0.95,
+                      workers=None, base_seed=None, cache=None):
+    """Finds the cheapest resource mix meeting KPI targets by successive halving.
+
+    space maps config keys to candidate values (e.g. {'NUM_DOCTORS': [2, 3, 4]})
+    and constraints is a list of (kpi, op, threshold) such as
+    ('treatment_wait_p95', '<', 30). Every round runs all surviving
+    candidates on common seeds, drops those whose confidence interval lies
+    entirely on the wrong side of a target or (at full run length) that
+    cost more than a candidate whose intervals already meet every target,
+    then keeps the best 1/eta (those meeting the targets on average first,
+    by cost, then the rest by smallest violation). Replications and run
+    length grow by eta each round, from initial_sim_time (default a quarter
+    of SIM_TIME) up to SIM_TIME with final_replications. cache is an
+    optional ResultCache, so re-running a search is mostly lookups.
+    """
+    for kpi, op, _ in constraints:
+        if op not in CONSTRAINT_OPS:
+            raise ValueError(f"Unknown operator {op!r} in the {kpi} constraint; expected one of {', '.join(CONSTRAINT_OPS)}")
+    if costs is None:
+        costs = {key: cost for key, cost in DEFAULT_COSTS.items() if key in base_config}
+    if base_seed is None:
+        base_seed = base_config['RANDOM_SEED']
+    if workers is None:
+        workers = os.cpu_count() or 1
+    full_time = base_config['SIM_TIME']
+    sim_time = initial_sim_time if initial_sim_time is not None else max(1, full_time // 4)
+    replications = initial_replications
+    seeds = replication_seeds(base_seed, final_replications)
+
+    candidates = []
+    for overrides in grid_design(space):
+        candidates.append(Candidate(overrides, config_cost(dict(base_config, **overrides), costs)))
+
+    rounds = []
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        round_number = 0
+        while True:
+            final = sim_time >= full_time and replications >= final_replications
+            for candidate in candidates:
+                candidate.summaries = []
+            jobs = [
+                (candidate, (dict(base_config, SIM_TIME=sim_time, **candidate.overrides), seed, cache))
+                for candidate in candidates for seed in seeds[:replications]
+            ]
+            for (candidate, _), summary in zip(jobs, executor.map(run_replication, [job for _, job in jobs])):
+                candidate.summaries.append(summary)
+            for candidate in candidates:
+                candidate.evaluate(constraints, confidence)
+
+            survivors = [c for c in candidates if not c.clearly_infeasible(constraints)]
+            dropped = len(candidates) - len(survivors)
+            # Shortened runs start from an empty hospital and understate
+            # waits, so cost is only used to prune at full run length
+            proven = [c for c in survivors if c.clearly_feasible(constraints)]
+            if proven and sim_time >= full_time:
+                cheapest = min(c.cost for c in proven)
+                survivors = [c for c in survivors if c.cost <= cheapest]
+            survivors.sort(key=lambda c: (c.violation > 0, c.violation if c.violation > 0 else c.cost, c.cost))
+            rounds.append({'round': round_number, 'candidates': len(candidates), 'replications': replications,
+                           'sim_time': sim_time, 'dropped': dropped})
+
+            if final or not survivors:
+                candidates = survivors
+                break
+            candidates = survivors[:max(1, math.ceil(len(survivors) / eta))]
+            sim_time = min(full_time, sim_time * eta)
+            replications = min(final_replications, replications * eta)
+            round_number += 1
+
+    best = next((c for c in candidates if c.violation == 0), None)
+    config = dict(base_config, **best.overrides) if best is not None else None
+    return OptimizationResult(best, config, rounds)
+
+
+if __name__ == '__main__':
+    from simulation import DEFAULT_CONFIG
+    result = optimize_staffing(
+        DEFAULT_CONFIG,
+        {'NUM_DOCTORS': [2, 3, 4, 5], 'NUM_NURSES': [3, 4, 5], 'NUM_BEDS': [6, 10]},
+        [('treatment_wait_p95', '<', 30)],
+    )
+    result.report()
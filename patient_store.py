@@ -0,0 +1,79 @@
+# patient_store.py
+
+from array import array
+from arrivals import PATIENT_TYPES
+from entities import STAGES
+
+# Patient type names in the order of their codes in the patient_type column
+TYPE_NAMES = tuple(PATIENT_TYPES)
+_TYPE_CODES = {name: code for code, name in enumerate(TYPE_NAMES)}
+
+
+class PatientStore:
+    """Column-oriented store of discharged patients.
+
+    Patients are appended at discharge and only their fields are kept, one
+    typed array per column, so memory per patient is a few hundred bytes
+    of packed numbers instead of a Patient object plus a timestamps dict.
+    Stage columns are named '<stage>_wait', '<stage>_start' and
+    '<stage>_end' and hold NaN for stages the patient never reached.
+    """
+
+    def __init__(self):
+        self.patient_id = []  # ints, or strings for disaster patients
+        self.patient_type = array('b')
+        self.severity_level = array('b')
+        self.code_blue = array('b')
+        self.arrival_time = array('d')
+        self.discharge_time = array('d')
+        self.time_columns = {}
+        for stage in STAGES:
+            for suffix in ('wait', 'start', 'end'):
+                self.time_columns[f'{stage}_{suffix}'] = array('d')
+        # Same order as Patient.times, so append can zip them
+        self._time_arrays = list(self.time_columns.values())
+
+    def __len__(self):
+        return len(self.arrival_time)
+
+    def append(self, patient):
+        """Copies a discharged patient into the columns."""
+        self.patient_id.append(patient.patient_id)
+        self.patient_type.append(_TYPE_CODES[patient.patient_type])
+        self.severity_level.append(patient.severity_level)
+        self.code_blue.append(patient.code_blue)
+        self.arrival_time.append(patient.arrival_time)
+        self.discharge_time.append(patient.discharge_time)
+        for column, value in zip(self._time_arrays, patient.times):
+            column.append(value)
+
+    def clear(self):
+        """Drops every stored patient."""
+        self.__init__()
+
+    def columns(self):
+        """Returns every column by name (raw arrays, not copies)."""
+        columns = {
+            'patient_id': self.patient_id,
+            'patient_type': self.patient_type,
+            'severity_level': self.severity_level,
+            'code_blue': self.code_blue,
+            'arrival_time': self.arrival_time,
+            'discharge_time': self.discharge_time,
+        }
+        columns.update(self.time_columns)
+        return columns
+
+    def to_frame(self):
+        """Returns the store as a pandas DataFrame built column-wise."""
+        import numpy as np
+        import pandas as pd
+        data = {'patient_id': self.patient_id}
+        data['patient_type'] = pd.Categorical.from_codes(np.frombuffer(self.patient_type, dtype=np.int8).copy(), TYPE_NAMES)
+        data['severity_level'] = np.frombuffer(self.severity_level, dtype=np.int8).copy()
+        data['code_blue'] = np.frombuffer(self.code_blue, dtype=np.int8).astype(bool)
+        data['arrival_time'] = np.frombuffer(self.arrival_time).copy()
+        data['discharge_time'] = np.frombuffer(self.discharge_time).copy()
+        for name, column in self.time_columns.items():
+            data[name] = np.frombuffer(column).copy()
+        return pd.DataFrame(data)
@@ -1,128 +1,170 @@
 # processes.py
 
-import random
-from entities import Patient
+import itertools
+from math import inf
+from entities import Patient, STAGES, REGISTRATION, TRIAGE, DIAGNOSTICS, SURGERY, TREATMENT, RECOVERY
+from arrivals import PATIENT_TYPES, arrival_profiles, arrival_schedules
 import simpy
+from simpy.resources.resource import Preempted
+from monitoring import BundleRequest
+
+
+# Requests of this priority or better (code blue, severity 5) may preempt
+PREEMPTING_PRIORITY = 1
 
 
 def patient_process(env: simpy.Environment, patient: Patient, hospital: 'Hospital'):
     """Simulates the process flow of a single patient."""
-    arrival_time = env.now
-    patient.timestamps['arrival'] = arrival_time
-    print(f'Patient {patient.patient_id} ({patient.patient_type}, Severity {patient.severity_level}) arrives at {env.now:.2f}')
+    tracer = hospital.tracer
+    if tracer.patient:
+        tracer.emit(env.now, 'patient', patient.patient_id, 'arrive')
     
-    # Handle Code Blue scenarios immediately
+    # Handle Code Blue scenarios immediately; nothing outranks it, so it is never preempted
     if patient.code_blue:
-        with hospital.doctor.request(priority=0) as doctor_request:
+        with hospital.doctor.request(priority=0, preempt=True) as doctor_request:
             yield doctor_request
             yield env.process(hospital.code_blue_response(patient))
-        patient.timestamps['discharge'] = env.now
-        hospital.patients.append(patient)
+        patient.discharge_time = env.now
+        hospital.discharge(patient)
         return
     
     # Registration (skip for emergency patients)
     if patient.patient_type != 'emergency':
-        with hospital.admin_staff.request(priority=patient.severity_level) as admin_request, \
-             hospital.nurse.request(priority=patient.severity_level) as nurse_request:
-            reg_start = env.now
-            yield admin_request & nurse_request
-            wait_time = env.now - reg_start
-            patient.timestamps['registration_wait'] = wait_time
-            patient.timestamps['registration_start'] = env.now
-            yield env.process(hospital.registration(patient))
-            patient.timestamps['registration_end'] = env.now
+        yield from stage_process(env, hospital, patient, REGISTRATION, (hospital.admin_staff, hospital.nurse))
     
     # Triage
-    with hospital.nurse.request(priority=patient.severity_level) as nurse_request:
-        triage_start = env.now
-        yield nurse_request
-        wait_time = env.now - triage_start
-        patient.timestamps['triage_wait'] = wait_time
-        patient.timestamps['triage_start'] = env.now
-        yield env.process(hospital.triage(patient))
-        patient.timestamps['triage_end'] = env.now
+    yield from stage_process(env, hospital, patient, TRIAGE, (hospital.nurse,))
     
     # Diagnostics if needed
     if patient.needs_diagnostics:
-        if random.choice(['lab', 'imaging_center']) == 'lab':
+        if hospital.streams.routing.choice(['lab', 'imaging_center']) == 'lab':
             facility = hospital.lab
-            facility_name = 'lab'
         else:
             facility = hospital.imaging_center
-            facility_name = 'imaging center'
-        with hospital.support_staff.request(priority=patient.severity_level) as support_request, \
-             hospital.medical_equipment.request(priority=patient.severity_level) as equipment_request, \
-             facility.request(priority=patient.severity_level) as facility_request:
-            diag_start = env.now
-            yield support_request & equipment_request & facility_request
-            wait_time = env.now - diag_start
-            patient.timestamps['diagnostics_wait'] = wait_time
-            patient.timestamps['diagnostics_start'] = env.now
-            yield env.process(hospital.diagnostics(patient))
-            patient.timestamps['diagnostics_end'] = env.now
+        yield from stage_process(env, hospital, patient, DIAGNOSTICS,
+                                 (hospital.support_staff, hospital.medical_equipment, facility))
     
     # Surgery if needed
     if patient.needs_surgery:
-        with hospital.specialist.request(priority=patient.severity_level) as specialist_request, \
-             hospital.operating_room.request(priority=patient.severity_level) as or_request, \
-             hospital.medical_equipment.request(priority=patient.severity_level) as equipment_request:
-            surg_start = env.now
-            yield specialist_request & or_request & equipment_request
-            wait_time = env.now - surg_start
-            patient.timestamps['surgery_wait'] = wait_time
-            patient.timestamps['surgery_start'] = env.now
-            yield env.process(hospital.surgery(patient))
-            patient.timestamps['surgery_end'] = env.now
+        yield from stage_process(env, hospital, patient, SURGERY,
+                                 (hospital.specialist, hospital.operating_room, hospital.medical_equipment))
         # Recovery after surgery
-        with hospital.bed.request(priority=patient.severity_level) as bed_request:
-            recov_start = env.now
-            yield bed_request
-            wait_time = env.now - recov_start
-            patient.timestamps['recovery_wait'] = wait_time
-            patient.timestamps['recovery_start'] = env.now
-            recovery_time = random.randint(30, 60)
-            yield env.timeout(recovery_time)
-            patient.timestamps['recovery_end'] = env.now
+        yield from stage_process(env, hospital, patient, RECOVERY, (hospital.bed,))
     else:
         # Treatment (if no surgery)
-        with hospital.doctor.request(priority=patient.severity_level) as doctor_request, \
-             hospital.bed.request(priority=patient.severity_level) as bed_request, \
-             hospital.medical_equipment.request(priority=patient.severity_level) as equipment_request:
-            treat_start = env.now
-            yield doctor_request & bed_request & equipment_request
-            wait_time = env.now - treat_start
-            patient.timestamps['treatment_wait'] = wait_time
-            patient.timestamps['treatment_start'] = env.now
-            yield env.process(hospital.treatment(patient))
-            patient.timestamps['treatment_end'] = env.now
+        yield from stage_process(env, hospital, patient, TREATMENT,
+                                 (hospital.doctor, hospital.bed, hospital.medical_equipment))
     
     # Patient discharge
-    patient.timestamps['discharge'] = env.now
-    hospital.patients.append(patient)
+    patient.discharge_time = env.now
+    if tracer.patient:
+        tracer.emit(env.now, 'patient', patient.patient_id, 'discharge')
+    hospital.discharge(patient)
+
+
+def stage_process(env: simpy.Environment, hospital: 'Hospital', patient: Patient, stage: int, resources):
+    """Acquires all resources of a stage at once, serves it and releases them.
+
+    The resources are requested as one BundleRequest, so a patient holds
+    nothing while waiting. With PREEMPTION on, a patient of priority
+    PREEMPTING_PRIORITY or better can take a doctor, operating room or bed
+    from a lower-priority one. The displaced patient releases the rest of
+    the stage's resources too and queues again for all of them as one
+    bundle, so it holds nothing while it waits; it then serves the rest
+    of the stage ('resume') or all of it again ('restart'). Every
+    preemption is recorded by the hospital.
+    """
+    tracer = hospital.tracer
+    name = STAGES[stage]
+    priority = patient.priority
+    preempt = priority <= PREEMPTING_PRIORITY
+    bundle = BundleRequest(env, resources, priority, preempt)
+    requested_at = env.now
+    duration = remaining = None
+    begun = False
+    try:
+        while True:
+            service = None
+            try:
+                if not bundle.triggered:
+                    yield bundle
+                if not begun:
+                    begun = True
+                    patient.begin(stage, requested_at, env.now)
+                    if tracer.patient:
+                        tracer.emit(env.now, 'patient', patient.patient_id, 'start', name)
+                    if hospital.preemption != 'off':
+                        duration = remaining = hospital.service_time(patient, stage)
+                # The service runs as the hospital's stage sub-process, so
+                # the profiler attributes it to the stage
+                started = env.now
+                service = env.process(getattr(hospital, name)(patient, remaining))
+                yield service
+                break
+            except simpy.Interrupt as interrupt:
+                cause = interrupt.cause
+                if not isinstance(cause, Preempted):
+                    raise
+                if service is not None:
+                    if service.is_alive:
+                        # Stop the service; its failure is expected
+                        service.defused = True
+                        service.interrupt(cause)
+                    remaining = remaining - (env.now - started) if hospital.preemption == 'resume' else duration
+                    # Give back the rest of the stage and queue again for all of it;
+                    # losing a second resource while that bundle waits changes nothing
+                    bundle.release()
+                    bundle = BundleRequest(env, resources, priority, preempt)
+                hospital.record_preemption(patient, stage, cause.resource, remaining)
+        patient.finish(stage, env.now)
+        if tracer.patient:
+            tracer.emit(env.now, 'patient', patient.patient_id, 'end', name)
+    finally:
+        bundle.cancel()
+        bundle.release()
+
+
+def start_arrivals(env: simpy.Environment, hospital: 'Hospital', config: dict):
+    """Starts one independent arrival process per patient type.
+
+    With VECTORIZED_SAMPLING the arrival times up to SIM_TIME are drawn
+    up front in one NumPy call per type. With ARRIVAL_LOG the logged
+    arrivals are replayed instead (see replay.py).
+    """
+    patient_ids = itertools.count(1)
+    if config.get('ARRIVAL_LOG'):
+        from replay import ArrivalLog, replay_arrivals
+        log = ArrivalLog(config['ARRIVAL_LOG'], start=config.get('ARRIVAL_LOG_START'))
+        env.process(replay_arrivals(env, hospital, log, patient_ids))
+        return
+    schedules = {}
+    horizon = 0.0
+    if hospital.streams.vectorized:
+        horizon = config['SIM_TIME']
+        schedules = arrival_schedules(config, horizon, hospital.streams.seed)
+    for patient_type, profile in arrival_profiles(config).items():
+        rng = hospital.streams.stream(f'arrivals/{patient_type}')
+        env.process(patient_arrivals(env, hospital, patient_type, profile, rng, patient_ids,
+                                     schedules.get(patient_type), horizon))
+
+
+def patient_arrivals(env: simpy.Environment, hospital: 'Hospital', patient_type: str, profile, rng,
+                     patient_ids, schedule=None, horizon=0.0):
+    """Generates the patients of one type from its rate profile.
 
-def patient_arrivals(env: simpy.Environment, hospital: 'Hospital', config: dict):
-    """Generates patients arriving at the hospital."""
-    patient_num = 0
+    Arrival times come from schedule, which holds every arrival before
+    horizon, and after it from the profile; the severity is drawn from
+    the type's range at arrival.
+    """
+    low, high = PATIENT_TYPES[patient_type][1]
+    pending = iter(schedule.tolist()) if schedule is not None else iter(())
     while True:
-        # Determine patient type and arrival time based on type
-        patient_type = random.choices(
-            ['emergency', 'scheduled', 'walk-in'],
-            weights=[1, 2, 7],
-            k=1
-        )[0]
-        
-        if patient_type == 'emergency':
-            inter_arrival_time = random.expovariate(1/30)
-            severity_level = random.randint(4, 5)
-        elif patient_type == 'scheduled':
-            inter_arrival_time = random.expovariate(1/15)
-            severity_level = random.randint(2, 3)
-        else:  # walk-in
-            inter_arrival_time = random.expovariate(1/10)
-            severity_level = random.randint(1, 4)
-        
-        yield env.timeout(inter_arrival_time)
-        patient_num += 1
-        arrival_time = env.now
-        patient = Patient(patient_num, patient_type, severity_level, arrival_time)
-        env.process(patient_process(env, patient, hospital))
\ No newline at end of file
+        arrival_time = next(pending, None)
+        if arrival_time is None:
+            arrival_time = profile.next_arrival(max(env.now, horizon), rng)
+            if arrival_time == inf:
+                return
+        yield env.timeout(arrival_time - env.now)
+        severity_level = rng.randint(low, high)
+        patient = Patient(next(patient_ids), patient_type, severity_level, env.now, hospital.streams.patients)
+        env.process(patient_process(env, patient, hospital))
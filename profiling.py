@@ -0,0 +1,155 @@
+# profiling.py
+
+from array import array
+from collections import Counter, defaultdict
+from time import perf_counter
+import simpy
+from simpy.core import EmptySchedule
+from simpy.events import Condition, Initialize, Process
+from entities import STAGES
+from simulation import build_simulation
+
+# Sub-processes started by patient_process, reported under it
+PATIENT_SUBPROCESSES = set(STAGES) | {'code_blue_response'}
+
+
+class ProfiledEnvironment(simpy.Environment):
+    """simpy Environment that accounts for every event it processes.
+
+    Opt-in: pass it to build_simulation(env=...). It counts processed
+    events by type (Timeout, Initialize, Process, BundleRequest and
+    PriorityRequest grants, Release, ...), charges the wall time of each
+    step to the process it resumes, e.g. 'patient_process;triage;service'
+    or 'patient_process;acquire;doctor+bed+medical_equipment', and
+    samples the size of the event heap every heap_interval simulated
+    minutes.
+    """
+
+    def __init__(self, initial_time=0, heap_interval=1.0):
+        super().__init__(initial_time)
+        self.event_counts = Counter()
+        self.stack_times = defaultdict(float)
+        self.stack_counts = Counter()
+        self.heap_interval = heap_interval
+        self.heap_time = array('d')
+        self.heap_size = array('l')
+        self.max_heap = 0
+        self.wall_time = 0.0
+        self._next_heap_sample = initial_time
+
+    def step(self):
+        queue = self._queue
+        if not queue:
+            raise EmptySchedule
+        event = queue[0][3]
+        # Callbacks are cleared while the event is processed, so label first
+        stack = self.stack_of(event)
+        start = perf_counter()
+        try:
+            super().step()
+        finally:
+            elapsed = perf_counter() - start
+            self.wall_time += elapsed
+            self.event_counts[type(event).__name__] += 1
+            self.stack_times[stack] += elapsed
+            self.stack_counts[stack] += 1
+            size = len(queue)
+            if size > self.max_heap:
+                self.max_heap = size
+            if self._now >= self._next_heap_sample:
+                self.heap_time.append(self._now)
+                self.heap_size.append(size)
+                self._next_heap_sample = self._now + self.heap_interval
+
+    def stack_of(self, event):
+        """Folded-stack label of the work done when event is processed."""
+        owners = [getattr(callback, '__self__', None) for callback in event.callbacks or ()]
+        for owner in owners:
+            if isinstance(owner, Process):
+                return _process_stack(owner, event)
+        if any(isinstance(owner, Condition) for owner in owners):
+            # A request or sub-event checked by an '&' condition
+            return 'simpy;condition_check'
+        return 'simpy;' + type(event).__name__
+
+    def summary(self):
+        """Returns a JSON-ready dict of the profile so far."""
+        heap = self.heap_size
+        return {
+            'wall_time': self.wall_time,
+            'events': sum(self.event_counts.values()),
+            'event_counts': dict(self.event_counts.most_common()),
+            'stacks': {
+                stack: {'seconds': seconds, 'steps': self.stack_counts[stack]}
+                for stack, seconds in sorted(self.stack_times.items(), key=lambda item: -item[1])
+            },
+            'heap': {
+                'max': self.max_heap,
+                'mean': sum(heap) / len(heap) if heap else 0.0,
+                'samples': len(heap),
+            },
+        }
+
+    def report(self):
+        summary = self.summary()
+        print(f"\n{summary['events']} events in {summary['wall_time']:.3f} s "
+              f"(heap max {summary['heap']['max']}, mean {summary['heap']['mean']:.1f})")
+        print("Events by type:")
+        for kind, count in summary['event_counts'].items():
+            print(f"  {kind}: {count}")
+        print("Wall time by process and stage:")
+        for stack, entry in summary['stacks'].items():
+            share = entry['seconds'] / summary['wall_time'] * 100 if summary['wall_time'] else 0.0
+            print(f"  {stack}: {entry['seconds'] * 1000:.1f} ms ({share:.1f}%), {entry['steps']} steps")
+
+    def write_folded(self, path):
+        """Writes 'frame;frame microseconds' lines for flamegraph.pl / speedscope."""
+        with open(path, 'w', encoding='utf-8') as f:
+            for stack, seconds in sorted(self.stack_times.items()):
+                f.write(f"{stack} {round(seconds * 1e6)}\n")
+
+
+def _process_stack(process, event):
+    """Stack label of process being resumed by event."""
+    name = process._generator.__name__
+    if name in PATIENT_SUBPROCESSES:
+        return f'patient_process;{name};service'
+    if name != 'patient_process':
+        return process._generator.__qualname__
+    # patient_process resumes at arrival, after a stage sub-process or on a resource grant
+    if isinstance(event, Process):
+        return f'patient_process;{event._generator.__name__}'
+    if isinstance(event, Initialize):
+        return 'patient_process;arrive'
+    if isinstance(event, Condition):
+        names = [getattr(getattr(e, 'resource', None), 'name', None) for e in event._events]
+        return 'patient_process;acquire;' + '+'.join(n for n in names if n)
+    resources = getattr(event, 'resources', None)
+    if resources is not None:
+        return 'patient_process;acquire;' + '+'.join(resource.name for resource in resources)
+    resource = getattr(event, 'resource', None)
+    if resource is not None:
+        return f'patient_process;acquire;{resource.name}'
+    return f'patient_process;{type(event).__name__}'
+
+
+def profile_simulation(config, seed=None, heap_interval=1.0):
+    """Runs one replication on a ProfiledEnvironment; returns (env, hospital)."""
+    env = ProfiledEnvironment(heap_interval=heap_interval)
+    env, hospital = build_simulation(config, seed=seed, env=env)
+    env.run(until=hospital.config['SIM_TIME'])
+    return env, hospital
+
+
+if __name__ == '__main__':
+    import argparse
+    from simulation import DEFAULT_CONFIG
+    parser = argparse.ArgumentParser(description='Profiles one simulation run')
+    parser.add_argument('--sim-time', type=float, default=DEFAULT_CONFIG['SIM_TIME'])
+    parser.add_argument('--seed', type=int)
+    parser.add_argument('--folded', help='Write a flamegraph-compatible folded stack file')
+    args = parser.parse_args()
+    env, _ = profile_simulation(dict(DEFAULT_CONFIG, SIM_TIME=args.sim_time), seed=args.seed)
+    env.report()
+    if args.folded:
+        env.write_folded(args.folded)
@@ -0,0 +1,120 @@
+# replay.py
+
+import csv
+import os
+from datetime import datetime
+from entities import Patient, STAGES, SEVERITY_LEVELS
+from arrivals import PATIENT_TYPES
+from processes import patient_process
+
+# Records read from the log per chunk
+DEFAULT_CHUNK_SIZE = 10000
+# Column names accepted for each field, first match wins
+TYPE_COLUMNS = ('patient_type', 'type')
+SEVERITY_COLUMNS = ('severity_level', 'severity')
+# Optional service-time override columns, e.g. 'treatment_time'
+SERVICE_COLUMNS = {f'{stage}_time': index for index, stage in enumerate(STAGES)}
+
+
+class ArrivalLog:
+    """Lazily reads a historical arrival log (CSV or Parquet).
+
+    Each row needs a timestamp, a patient type and a severity; columns
+    named '<stage>_time' (e.g. 'treatment_time') override the sampled
+    service time of that stage, and empty cells keep the sampled one.
+    Timestamps are minutes from the start of the replay, or ISO 8601
+    datetimes counted in minutes from start (default: the first row).
+    The file is read chunk_size rows at a time and rows must be in time
+    order, so memory does not grow with the length of the log.
+    """
+
+    def __init__(self, path, chunk_size=DEFAULT_CHUNK_SIZE, fmt=None, start=None):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.format = fmt or os.path.splitext(path)[1].lstrip('.').lower()
+        if self.format not in ('csv', 'parquet'):
+            raise ValueError(f'{path}: arrival logs must be CSV or Parquet')
+        self.start = datetime.fromisoformat(start) if isinstance(start, str) else start
+
+    def chunks(self):
+        """Yields lists of raw row dicts, chunk_size rows at a time."""
+        if self.format == 'parquet':
+            import pyarrow.parquet as pq  # optional dependency, only needed for Parquet logs
+            for batch in pq.ParquetFile(self.path).iter_batches(batch_size=self.chunk_size):
+                yield batch.to_pylist()
+            return
+        with open(self.path, newline='', encoding='utf-8') as f:
+            chunk = []
+            for row in csv.DictReader(f):
+                chunk.append(row)
+                if len(chunk) == self.chunk_size:
+                    yield chunk
+                    chunk = []
+            if chunk:
+                yield chunk
+
+    def __iter__(self):
+        """Yields (time, patient type, severity, service overrides or None) in time order."""
+        previous = float('-inf')
+        line = 0
+        for chunk in self.chunks():
+            for row in chunk:
+                line += 1
+                record = self.parse(row, line)
+                if record[0] < previous:
+                    raise ValueError(f'{self.path}: row {line} is earlier than the row before it')
+                previous = record[0]
+                yield record
+
+    def parse(self, row, line):
+        time = self.minutes(_field(row, ('timestamp',), line, self.path))
+        patient_type = _field(row, TYPE_COLUMNS, line, self.path)
+        if patient_type not in PATIENT_TYPES:
+            raise ValueError(f'{self.path}: row {line} has unknown patient type {patient_type!r}')
+        severity = int(_field(row, SEVERITY_COLUMNS, line, self.path))
+        if severity not in SEVERITY_LEVELS:
+            raise ValueError(f'{self.path}: row {line} has severity {severity} outside 1-5')
+        overrides = None
+        for column, stage in SERVICE_COLUMNS.items():
+            value = row.get(column)
+            if value is not None and value != '':
+                if overrides is None:
+                    overrides = {}
+                overrides[stage] = float(value)
+        return time, patient_type, severity, overrides
+
+    def minutes(self, value):
+        """Replay time of a timestamp: minutes as a number, or a datetime."""
+        if isinstance(value, (int, float)):
+            return float(value)
+        if isinstance(value, str):
+            try:
+                return float(value)
+            except ValueError:
+                value = datetime.fromisoformat(value)
+        if self.start is None:
+            self.start = value
+        return (value - self.start).total_seconds() / 60
+
+
+def _field(row, names, line, path):
+    for name in names:
+        value = row.get(name)
+        if value is not None and value != '':
+            return value
+    raise ValueError(f"{path}: row {line} has no {' or '.join(names)}")
+
+
+def replay_arrivals(env, hospital, log, patient_ids):
+    """Injects the patients of an ArrivalLog at their logged times.
+
+    Only the current chunk of the log is held in memory; with
+    STATS_MODE='online' a multi-year replay runs in flat memory. Rows
+    before the current time (e.g. a negative timestamp) arrive at once.
+    """
+    for time, patient_type, severity, overrides in log:
+        if time > env.now:
+            yield env.timeout(time - env.now)
+        patient = Patient(next(patient_ids), patient_type, severity, env.now, hospital.streams.patients)
+        patient.service_times = overrides
+        env.process(patient_process(env, patient, hospital))
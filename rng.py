@@ -0,0 +1,58 @@
+# rng.py
+
+import hashlib
+import random
+
+# Named substreams drawn from by the simulation
+# (each patient type's arrivals draw from its own stream, see processes.start_arrivals)
+STREAM_NAMES = ['patients', 'service', 'routing', 'disasters']
+
+
+class RandomStreams:
+    """Independent named random streams for one simulation.
+
+    Each stream is its own random.Random seeded from (seed, name), so
+    simulations sharing a process or thread never interleave draws, and
+    two configurations run with the same seed see the same arrivals,
+    service times and routing (common random numbers). With vectorized=True
+    the streams are NumPy-backed BlockSamplers instead.
+    """
+
+    def __init__(self, seed, vectorized=False):
+        self.seed = seed
+        self.vectorized = vectorized
+        for name in STREAM_NAMES:
+            setattr(self, name, self.stream(name))
+
+    def stream(self, name):
+        """Creates a generator for an additional named substream."""
+        if self.vectorized:
+            from sampling import BlockSampler
+            return BlockSampler(stream_seed(self.seed, name))
+        return random.Random(f'{self.seed}/{name}')
+
+
+def stream_seed(seed, name):
+    """64-bit seed of the named substream of seed."""
+    digest = hashlib.sha256(f'{seed}/{name}'.encode()).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+
+def numpy_generator(seed, name):
+    """numpy.random.Generator for the named substream of seed."""
+    import numpy as np  # optional dependency, only needed for vectorized draws
+    return np.random.default_rng(stream_seed(seed, name))
+
+
+def replication_seeds(base_seed, replications):
+    """Derives independent, reproducible seeds for each replication.
+
+    Seeds are hashed from (base_seed, index), so replication i always gets
+    the same streams no matter how many replications are run or on which
+    worker it lands.
+    """
+    seeds = []
+    for i in range(replications):
+        digest = hashlib.sha256(f'{base_seed}:{i}'.encode()).digest()
+        seeds.append(int.from_bytes(digest[:8], 'big') >> 1)
+    return seeds
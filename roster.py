@@ -0,0 +1,124 @@
+# roster.py
+
+from bisect import bisect_right
+from tracing import NULL_TRACER
+
+# Staffed pools: config headcount key -> resource name
+STAFF_POOLS = {
+    'NUM_DOCTORS': 'doctor',
+    'NUM_NURSES': 'nurse',
+    'NUM_SPECIALISTS': 'specialist',
+    'NUM_ADMIN_STAFF': 'admin_staff',
+    'NUM_SUPPORT_STAFF': 'support_staff',
+}
+# Breaks are taken between this long after the shift starts and this long before it ends
+BREAK_MARGIN = 60
+
+
+def shift_schedule(headcount, shift_duration, break_duration):
+    """Capacity change points [(offset, capacity)] of one shift with staggered breaks.
+
+    Everyone takes one break of break_duration. Breaks are rostered back
+    to back from BREAK_MARGIN minutes into the shift, in as many slots as
+    fit before the last BREAK_MARGIN minutes, so the number of change
+    points per shift does not grow with headcount. At least one person
+    always stays on duty; handovers overlap, so shift changes cost no
+    capacity.
+    """
+    changes = [(0, headcount)]
+    if headcount < 2 or break_duration <= 0:
+        return changes
+    windows = int((shift_duration - 2 * BREAK_MARGIN) // break_duration)
+    slots = min(headcount, windows)
+    if slots < 1:
+        return changes
+    away, extra = divmod(headcount, slots)
+    t = BREAK_MARGIN
+    for slot in range(slots):
+        off = min(away + (1 if slot < extra else 0), headcount - 1)
+        if headcount - off != changes[-1][1]:
+            changes.append((t, headcount - off))
+        t += break_duration
+    changes.append((t, headcount))
+    return changes
+
+
+class Roster:
+    """Drives the capacity of one resource pool from a periodic schedule.
+
+    A single process per pool replaces one generator per staff member:
+    it sleeps until the next change point of changes (offsets into a
+    cycle of length period) and calls set_capacity on the resource.
+    """
+
+    def __init__(self, env, resource, changes, period, tracer=None):
+        self.env = env
+        self.resource = resource
+        self.tracer = tracer if tracer is not None else NULL_TRACER
+        self.start = env.now
+        self.set_schedule(changes, period)
+        self.action = env.process(self.run())
+
+    def set_schedule(self, changes, period):
+        """Replaces the schedule and applies the capacity it gives for now."""
+        self.changes = sorted(changes)
+        self.offsets = [offset for offset, _ in self.changes]
+        self.period = period
+        capacity = self.capacity_at(self.env.now)
+        if capacity != self.resource.capacity:
+            self.apply(capacity)
+
+    def capacity_at(self, time):
+        offset = (time - self.start) % self.period if self.period else time - self.start
+        index = bisect_right(self.offsets, offset) - 1
+        return self.changes[max(index, 0)][1]
+
+    def apply(self, capacity):
+        self.resource.set_capacity(capacity)
+        if self.tracer.staff:
+            self.tracer.emit(self.env.now, 'staff', self.resource.name, 'capacity', capacity)
+
+    def run(self):
+        env = self.env
+        while True:
+            # Next change point after now, in this cycle or the next
+            elapsed = env.now - self.start
+            cycle, offset = divmod(elapsed, self.period) if self.period else (0, elapsed)
+            index = bisect_right(self.offsets, offset)
+            if index < len(self.offsets):
+                next_time = self.start + cycle * self.period + self.offsets[index]
+            elif self.period:
+                next_time = self.start + (cycle + 1) * self.period + self.offsets[0]
+            else:
+                return
+            yield env.timeout(next_time - env.now)
+            capacity = self.capacity_at(env.now)
+            if capacity != self.resource.capacity:
+                self.apply(capacity)
+
+
+def staff_rosters(env, hospital, config, tracer=None):
+    """Creates one Roster per staffed pool; returns {config key: Roster}.
+
+    Each pool follows shift_schedule for its headcount unless
+    config['STAFF_SCHEDULES'] gives it an explicit schedule as
+    {'period': minutes, 'changes': [[offset, capacity], ...]}. Explicit
+    capacities must be at least 1, since a resource cannot close: they are
+    checked here rather than failing mid-run at the change point.
+    """
+    schedules = config.get('STAFF_SCHEDULES') or {}
+    rosters = {}
+    for key, name in STAFF_POOLS.items():
+        resource = hospital.utilization.resources[name]
+        if key in schedules:
+            schedule = schedules[key]
+            changes = [tuple(change) for change in schedule['changes']]
+            if not changes or any(capacity < 1 for _, capacity in changes):
+                raise ValueError(f'STAFF_SCHEDULES[{key!r}] needs at least one change point '
+                                 'and capacities of 1 or more')
+            period = schedule.get('period')
+        else:
+            changes = shift_schedule(config[key], config['SHIFT_DURATION'], config['BREAK_DURATION'])
+            period = config['SHIFT_DURATION']
+        rosters[key] = Roster(env, resource, changes, period, tracer)
+    return rosters
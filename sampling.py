@@ -0,0 +1,67 @@
+# sampling.py
+
+
+class BlockSampler:
+    """Drop-in replacement for random.Random that pre-draws in NumPy blocks.
+
+    Every distinct call signature (e.g. randint(15, 45) or
+    expovariate(1/30)) owns a buffer of draws generated by one vectorized
+    NumPy call. A draw pops from its buffer and the buffer is refilled
+    lazily when it runs out, so per-draw cost is a dict lookup and a
+    list pop. Distributions match the random.Random methods they replace;
+    the streams themselves differ.
+    """
+
+    def __init__(self, seed, block_size=4096):
+        import numpy as np  # optional dependency, only needed when enabled
+        self._np = np
+        self._generator = np.random.default_rng(seed)
+        self.block_size = block_size
+        self._buffers = {}
+
+    def _draw(self, key):
+        """Generates a new block for the given call signature."""
+        kind = key[0]
+        generator = self._generator
+        size = self.block_size
+        if kind == 'randint':
+            block = generator.integers(key[1], key[2] + 1, size)
+        elif kind == 'random':
+            block = generator.random(size)
+        elif kind == 'expovariate':
+            block = generator.exponential(1 / key[1], size)
+        elif kind == 'choices':
+            weights = self._np.asarray(key[2], dtype=float)
+            block = generator.choice(key[1], size, p=weights / weights.sum())
+        else:
+            raise ValueError(f'Unknown sampler kind: {kind}')
+        return block.tolist()
+
+    def _next(self, key):
+        buffer = self._buffers.get(key)
+        if not buffer:
+            buffer = self._buffers[key] = self._draw(key)
+        return buffer.pop()
+
+    def randint(self, a, b):
+        """Integer in [a, b], both ends included."""
+        return self._next(('randint', a, b))
+
+    def random(self):
+        """Float in [0, 1)."""
+        return self._next(('random',))
+
+    def expovariate(self, lambd):
+        """Exponential with rate lambd."""
+        return self._next(('expovariate', lambd))
+
+    def choice(self, seq):
+        """Uniformly chosen element of a non-empty sequence."""
+        return seq[self._next(('randint', 0, len(seq) - 1))]
+
+    def choices(self, population, weights=None, k=1):
+        """k elements chosen with replacement, optionally weighted."""
+        if weights is None:
+            return [self.choice(population) for _ in range(k)]
+        key = ('choices', len(population), tuple(weights))
+        return [population[self._next(key)] for _ in range(k)]
@@ -0,0 +1,78 @@
+# sequential.py
+
+import math
+import os
+from concurrent.futures import ProcessPoolExecutor
+from batch import BatchResult, run_replication, confidence_interval
+from rng import replication_seeds
+from warmup import resolve_warmup
+
+
+def _precision_reached(summaries, targets, relative, confidence):
+    """Checks every KPI's half-width against its target."""
+    for kpi, target in targets.items():
+        mean, half_width = confidence_interval([summary[kpi] for summary in summaries], confidence)
+        if math.isnan(mean):
+            return False
+        if relative:
+            half_width = half_width / abs(mean) if mean else math.inf
+        if half_width > target:
+            return False
+    return True
+
+
+def run_until_precision(config, kpis, half_width, relative=False, confidence=0.95,
+                        workers=None, batch_size=None, min_replications=5,
+                        max_replications=1000, base_seed=None, cache=None):
+    """Adds replications in parallel batches until the CIs are tight enough.
+
+    kpis names the summary KPIs to watch (e.g. 'total_time_mean' or
+    'treatment_wait_mean_severity_5'); half_width is one target for all of
+    them or a {kpi: target} dict, absolute or relative to the mean. The
+    rule is checked after each batch of batch_size replications (default:
+    one per worker), and replications always use the first seeds in
+    order, so the stopping point is reproducible. The returned
+    BatchResult has converged set to False if max_replications was hit.
+    cache is an optional ResultCache shared with the workers.
+    """
+    if isinstance(kpis, str):
+        kpis = [kpis]
+    targets = half_width if isinstance(half_width, dict) else {kpi: half_width for kpi in kpis}
+    if base_seed is None:
+        base_seed = config['RANDOM_SEED']
+    if workers is None:
+        workers = os.cpu_count() or 1
+    if batch_size is None:
+        batch_size = workers
+    config = resolve_warmup(config, base_seed)
+    seeds = replication_seeds(base_seed, max_replications)
+
+    summaries = []
+    converged = False
+    executor = ProcessPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        while len(summaries) < max_replications:
+            # First batch covers the minimum number of replications
+            size = max(batch_size, min_replications - len(summaries))
+            jobs = [(config, seed, cache) for seed in seeds[len(summaries):len(summaries) + size]]
+            if executor is None:
+                summaries.extend(run_replication(job) for job in jobs)
+            else:
+                summaries.extend(executor.map(run_replication, jobs))
+            if len(summaries) >= min_replications and _precision_reached(summaries, targets, relative, confidence):
+                converged = True
+                break
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    result = BatchResult(config, summaries)
+    result.converged = converged
+    return result
+
+
+if __name__ == '__main__':
+    from simulation import DEFAULT_CONFIG
+    result = run_until_precision(DEFAULT_CONFIG, ['total_time_mean'], 0.05, relative=True)
+    print(f"{len(result.summaries)} replications, converged: {result.converged}")
+    result.report()
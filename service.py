@@ -0,0 +1,55 @@
+# service.py
+
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from cache import ResultCache, cache_key, run_analysis
+from rng import replication_seeds
+
+
+class SimulationService:
+    """Cached simulation runs on a background process pool, shared by front ends.
+
+    One service is meant to serve many sessions (e.g. every analyst of a
+    Streamlit server). Results come from the on-disk ResultCache when
+    present, and identical requests already in flight share one Future, so
+    nobody pays twice for the same (config, seed).
+    """
+
+    def __init__(self, workers=None, cache=None):
+        self.cache = cache if cache is not None else ResultCache()
+        self.executor = ProcessPoolExecutor(max_workers=workers or os.cpu_count() or 1)
+        self._pending = {}
+        self._lock = threading.Lock()
+
+    def submit(self, config, seed=None):
+        """Future of (AnalysisResult, resource_log) for one replication."""
+        key = cache_key(config, seed, 'analysis')
+        with self._lock:
+            future = self._pending.get(key)
+            if future is not None:
+                return future
+            cached = self.cache.get(key)
+            if cached is not None:
+                future = Future()
+                future.set_result(cached)
+                return future
+            future = self.executor.submit(run_analysis, config, seed, self.cache)
+            self._pending[key] = future
+        future.add_done_callback(lambda _, key=key: self._forget(key))
+        return future
+
+    def submit_replications(self, config, replications, base_seed=None):
+        """Futures of replications runs; a single run uses the config's own seed."""
+        if replications == 1:
+            return [self.submit(config)]
+        if base_seed is None:
+            base_seed = config['RANDOM_SEED']
+        return [self.submit(config, seed) for seed in replication_seeds(base_seed, replications)]
+
+    def _forget(self, key):
+        with self._lock:
+            self._pending.pop(key, None)
+
+    def shutdown(self):
+        self.executor.shutdown()
@@ -0,0 +1,67 @@
+# simulation.py
+
+import simpy
+from hospital import Hospital
+from processes import start_arrivals
+from rng import RandomStreams
+from warmup import resolve_warmup
+
+# Default scenario shared by the CLI, the GUIs and the batch runners
+DEFAULT_CONFIG = {
+    'NUM_DOCTORS': 3,
+    'NUM_NURSES': 5,
+    'NUM_BEDS': 10,
+    'NUM_SPECIALISTS': 2,
+    'NUM_ADMIN_STAFF': 3,
+    'NUM_SUPPORT_STAFF': 4,
+    'NUM_OPERATING_ROOMS': 1,
+    'NUM_LABS': 2,
+    'NUM_IMAGING_CENTERS': 1,
+    'NUM_MEDICAL_EQUIPMENT': 5,
+    'SHIFT_DURATION': 240,
+    'BREAK_DURATION': 15,
+    'SIM_TIME': 480,
+    'RANDOM_SEED': 42,
+    'VECTORIZED_SAMPLING': False,
+    'STATS_MODE': 'full',
+    'UTILIZATION_HISTORY': None,  # None: keep it unless STATS_MODE is 'online'
+    'UTILIZATION_RESOLUTION': 1,
+    'WARMUP_TIME': 0,
+    'WARMUP_METHOD': 'mser5',
+    'ARRIVAL_SCALE': 1,
+    'DISASTER_PROBABILITY': 0.05,
+    'STAFF_MODEL': 'roster',
+    'ARRIVAL_LOG': None,
+    'ARRIVAL_LOG_START': None,
+    'PREEMPTION': 'off',
+}
+
+
+def make_config(**overrides):
+    """Returns a copy of DEFAULT_CONFIG with the given keys replaced."""
+    config = dict(DEFAULT_CONFIG)
+    config.update(overrides)
+    return config
+
+
+def build_simulation(config, seed=None, tracer=None, env=None):
+    """Sets up one replication at time 0 and returns (env, hospital).
+
+    env defaults to a plain simpy Environment; pass e.g. a
+    profiling.ProfiledEnvironment to instrument the run.
+    """
+    config = resolve_warmup(config, seed)
+    streams = RandomStreams(config['RANDOM_SEED'] if seed is None else seed,
+                            vectorized=config.get('VECTORIZED_SAMPLING', False))
+    if env is None:
+        env = simpy.Environment()
+    hospital = Hospital(env, config, tracer=tracer, streams=streams)
+    start_arrivals(env, hospital, config)
+    return env, hospital
+
+
+def run_simulation(config, seed=None, tracer=None):
+    """Runs one replication of the scenario and returns the Hospital."""
+    env, hospital = build_simulation(config, seed=seed, tracer=tracer)
+    env.run(until=hospital.config['SIM_TIME'])
+    return hospital
@@ -0,0 +1,103 @@
+# snapshot.py
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from simulation import build_simulation
+from data_analysis import summarize
+
+
+class Snapshot:
+    """A simulation paused at time, reconstructed by deterministic replay.
+
+    Live simpy state (the event queue, in-flight patient_process
+    generators, queued requests) cannot be pickled, so a snapshot keeps
+    only what determines it: the config, the seed and the interventions
+    applied so far as (time, {capacity key: value}) pairs. Every random
+    draw comes from the seeded named streams, so restore() rebuilds the
+    exact same state. Snapshots are small, picklable and JSON-serializable.
+    """
+
+    def __init__(self, config, time, seed=None, interventions=()):
+        self.config = config
+        self.time = time
+        self.seed = config['RANDOM_SEED'] if seed is None else seed
+        self.interventions = [(t, dict(changes)) for t, changes in interventions]
+
+    def restore(self, tracer=None):
+        """Replays the run up to self.time and returns (env, hospital)."""
+        env, hospital = build_simulation(self.config, seed=self.seed, tracer=tracer)
+        for t, changes in self.interventions:
+            if t > env.now:
+                env.run(until=t)
+            for key, value in changes.items():
+                hospital.set_capacity(key, value)
+        if self.time > env.now:
+            env.run(until=self.time)
+        return env, hospital
+
+    def state(self):
+        """Hospital.state() at the snapshot time."""
+        return self.restore()[1].state()
+
+    def fork(self, changes):
+        """New snapshot at the same time with capacity changes applied."""
+        return Snapshot(self.config, self.time, self.seed, self.interventions + [(self.time, changes)])
+
+    def advance(self, time):
+        """Snapshot of the same run at a later time."""
+        return Snapshot(self.config, time, self.seed, self.interventions)
+
+    def to_dict(self):
+        return {'config': self.config, 'time': self.time, 'seed': self.seed,
+                'interventions': [[t, changes] for t, changes in self.interventions]}
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['config'], data['time'], data['seed'], data['interventions'])
+
+    def save(self, path):
+        tmp = path + '.tmp'
+        with open(tmp, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, indent=2)
+        os.replace(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
+
+
+def run_fork(job):
+    """Restores (snapshot, until), runs to until and returns the KPI summary."""
+    snapshot, until = job
+    env, hospital = snapshot.restore()
+    env.run(until=until if until is not None else hospital.config['SIM_TIME'])
+    return summarize(hospital)
+
+
+def fork_variants(snapshot, variants, until=None, workers=None):
+    """Runs one what-if per {capacity key: value} dict from snapshot, in parallel.
+
+    Each worker replays the shared prefix itself, so only the snapshot is
+    sent to it. Returns the KPI summaries in the order of variants; pass
+    {} as a variant to include the unchanged run.
+    """
+    if workers is None:
+        workers = os.cpu_count() or 1
+    jobs = [(snapshot.fork(changes), until) for changes in variants]
+    if workers == 1:
+        return [run_fork(job) for job in jobs]
+    with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+        return list(executor.map(run_fork, jobs))
+
+
+if __name__ == '__main__':
+    from simulation import DEFAULT_CONFIG
+    # At 14:00 on the first day, what if there were one or two more doctors?
+    config = dict(DEFAULT_CONFIG, SIM_TIME=24 * 60)
+    snapshot = Snapshot(config, 14 * 60, seed=7)
+    print(snapshot.state()['resources']['doctor'])
+    variants = [{}, {'NUM_DOCTORS': 4}, {'NUM_DOCTORS': 5}]
+    for changes, kpis in zip(variants, fork_variants(snapshot, variants)):
+        print(changes or 'unchanged', f"total time {kpis['total_time_mean']:.2f} minutes")
@@ -0,0 +1,132 @@
+# sweep.py
+
+import csv
+import itertools
+import os
+import random
+import sys
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from batch import run_replication
+from cache import cache_key
+from rng import replication_seeds
+
+
+def grid_design(space):
+    """Full grid over {key: [values]}; returns a list of override dicts."""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+
+def factorial_design(levels):
+    """Two-level full factorial over {key: (low, high)}."""
+    return grid_design({key: [low, high] for key, (low, high) in levels.items()})
+
+
+def latin_hypercube(ranges, samples, seed=0):
+    """Latin hypercube sample of {key: (low, high)} with samples points.
+
+    Each key's range is cut into samples equal strata and every stratum is
+    used exactly once. Integer bounds (all the NUM_* keys) give integer
+    values.
+    """
+    rng = random.Random(seed)
+    design = [{} for _ in range(samples)]
+    for key, (low, high) in ranges.items():
+        strata = list(range(samples))
+        rng.shuffle(strata)
+        integer = isinstance(low, int) and isinstance(high, int)
+        for point, stratum in zip(design, strata):
+            u = (stratum + rng.random()) / samples
+            if integer:
+                point[key] = min(high, low + int(u * (high - low + 1)))
+            else:
+                point[key] = low + u * (high - low)
+    return design
+
+
+def job_key(config, seed):
+    """Stable identifier of one (full config, seed) job, used for resuming.
+
+    It covers the base config and the model version as well as the design
+    point, so a table written under other settings is not resumed from.
+    """
+    return cache_key(config, seed, kind='sweep')[:16]
+
+
+def _completed_jobs(path):
+    """Reads the keys already in a result table, dropping a torn last line."""
+    if not os.path.exists(path):
+        return set(), None
+    with open(path, 'rb') as f:
+        data = f.read()
+    if data and not data.endswith(b'\n'):
+        # The previous run died mid-write; drop the partial row
+        with open(path, 'wb') as f:
+            f.write(data[:data.rfind(b'\n') + 1])
+    with open(path, newline='', encoding='utf-8') as f:
+        reader = csv.DictReader(f)
+        done = {row['job_key'] for row in reader if None not in row.values()}
+        return done, reader.fieldnames
+
+
+def run_sweep(base_config, design, output, replications=1, workers=None, base_seed=None, cache=None):
+    """Runs every design point for replications seeds across a process pool.
+
+    Each finished job is appended to the CSV result table at output as it
+    completes (one row per job: job_key, replication, seed, the design
+    keys and the summary KPIs). Re-running with the same arguments skips
+    jobs already in the table, so an interrupted sweep resumes where it
+    stopped. A job that raises is reported on stderr and left out of the
+    table, so the other jobs finish and a re-run retries it. Replication i
+    of every design point uses the same seed, so points are compared under
+    common random numbers. With a ResultCache, jobs run by earlier sweeps
+    or batches are not simulated again.
+    """
+    if base_seed is None:
+        base_seed = base_config['RANDOM_SEED']
+    if workers is None:
+        workers = os.cpu_count() or 1
+    seeds = replication_seeds(base_seed, replications)
+    done, fieldnames = _completed_jobs(output)
+
+    jobs = []
+    for overrides in design:
+        for replication, seed in enumerate(seeds):
+            key = job_key(dict(base_config, **overrides), seed)
+            if key not in done:
+                jobs.append((key, replication, overrides, seed))
+    design_keys = list(dict.fromkeys(key for overrides in design for key in overrides))
+
+    with open(output, 'a', newline='', encoding='utf-8') as f:
+        writer = None
+        if fieldnames:
+            writer = csv.DictWriter(f, fieldnames=fieldnames, extrasaction='ignore')
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                executor.submit(run_replication, (dict(base_config, **overrides), seed, cache)): (key, replication, overrides)
+                for key, replication, overrides, seed in jobs
+            }
+            for future in as_completed(futures):
+                key, replication, overrides = futures[future]
+                try:
+                    summary = future.result()
+                except Exception as exc:
+                    print(f'sweep job {key} {overrides} failed: {exc!r}', file=sys.stderr)
+                    continue
+                row = {'job_key': key, 'replication': replication}
+                row.update(overrides)
+                row.update(summary)
+                if writer is None:
+                    names = ['job_key', 'replication', 'seed'] + design_keys
+                    names += [name for name in summary if name not in names]
+                    writer = csv.DictWriter(f, fieldnames=names, extrasaction='ignore')
+                    writer.writeheader()
+                writer.writerow(row)
+                f.flush()
+    return output
+
+
+if __name__ == '__main__':
+    from simulation import DEFAULT_CONFIG
+    design = grid_design({'NUM_DOCTORS': [2, 3, 4], 'NUM_NURSES': [4, 5, 6]})
+    print(run_sweep(DEFAULT_CONFIG, design, 'sweep_results.csv', replications=5))
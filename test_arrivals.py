@@ -0,0 +1,32 @@
+# test_arrivals.py
+
+from arrivals import arrival_schedules
+from simulation import DEFAULT_CONFIG, build_simulation
+from tracing import RingBufferSink, Tracer
+
+
+def count_arrivals(config, seed=7):
+    tracer = Tracer(RingBufferSink(), categories=['patient'])
+    env, hospital = build_simulation(config, seed=seed, tracer=tracer)
+    env.run(until=config['SIM_TIME'])
+    arrivals = sum(1 for record in tracer.sink.records() if record[3] == 'arrive')
+    return arrivals, hospital
+
+
+def test_vectorized_arrivals_match_schedule():
+    config = dict(DEFAULT_CONFIG, SIM_TIME=3 * 1440, VECTORIZED_SAMPLING=True, DISASTER_PROBABILITY=0)
+    arrivals, hospital = count_arrivals(config)
+    schedules = arrival_schedules(config, config['SIM_TIME'], hospital.streams.seed)
+    assert arrivals == sum(len(schedule) for schedule in schedules.values())
+
+
+def test_arrivals_continue_from_horizon():
+    config = dict(DEFAULT_CONFIG, SIM_TIME=1440, VECTORIZED_SAMPLING=True, DISASTER_PROBABILITY=0)
+    tracer = Tracer(RingBufferSink(), categories=['patient'])
+    env, hospital = build_simulation(config, seed=7, tracer=tracer)
+    env.run(until=2 * config['SIM_TIME'])
+    times = [record[0] for record in tracer.sink.records() if record[3] == 'arrive']
+    schedules = arrival_schedules(config, config['SIM_TIME'], hospital.streams.seed)
+    scheduled = sum(len(schedule) for schedule in schedules.values())
+    assert sum(1 for time in times if time < config['SIM_TIME']) == scheduled
+    assert len(times) > scheduled
@@ -0,0 +1,45 @@
+# test_cache.py
+
+import os
+import pickle
+from cache import ResultCache
+
+VALUE = b'x' * 1000
+ENTRY = len(pickle.dumps(VALUE, protocol=pickle.HIGHEST_PROTOCOL))
+
+
+def age(cache, key, mtime):
+    os.utime(cache.path(key), (mtime, mtime))
+
+
+def test_eviction_removes_least_recently_used_first(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=3 * ENTRY)
+    for i, key in enumerate(('aa1', 'bb2', 'cc3')):
+        cache.put(key, VALUE)
+        age(cache, key, 1000 + i)
+    # Reading aa1 makes bb2 the least recently used entry
+    assert cache.get('aa1') == VALUE
+    cache.put('dd4', VALUE)
+    assert cache.get('bb2') is None
+    assert all(cache.get(key) == VALUE for key in ('aa1', 'cc3', 'dd4'))
+    assert cache.size == 3 * ENTRY
+
+
+def test_size_tracks_puts_replacements_and_clear(tmp_path):
+    cache = ResultCache(str(tmp_path), max_bytes=10 * ENTRY)
+    cache.put('aa1', VALUE)
+    cache.put('bb2', VALUE)
+    assert cache.size == 2 * ENTRY
+    # Replacing an entry counts only the difference
+    cache.put('aa1', b'')
+    assert cache.size == ENTRY + len(pickle.dumps(b'', protocol=pickle.HIGHEST_PROTOCOL))
+    assert cache.size == sum(size for _, size, _ in cache.entries())
+    cache.clear()
+    assert cache.size == 0 and cache.entries() == []
+
+
+def test_size_starts_from_entries_already_on_disk(tmp_path):
+    ResultCache(str(tmp_path)).put('aa1', VALUE)
+    cache = ResultCache(str(tmp_path))
+    cache.put('bb2', VALUE)
+    assert cache.size == 2 * ENTRY
@@ -0,0 +1,34 @@
+# test_online_stats.py
+
+import math
+from data_analysis import analyze
+from online_stats import PERCENTILES
+from simulation import make_config, run_simulation
+
+
+def test_online_kpis_agree_with_full_analysis():
+    hospital = run_simulation(make_config(SIM_TIME=7 * 1440, STATS_MODE='both'))
+    result = analyze(hospital)
+    full = result.kpis()
+    online = hospital.online.kpis(hospital.utilization.summary())
+    assert full['patients'] == online['patients'] > 500
+    samples = {'total_time': result.patients['total_time_in_system']}
+    for stage in result.stages.index:
+        samples[f'{stage}_wait'] = result.patients[f'{stage}_wait_time'].dropna()
+    percentile_keys = set()
+    for name, sample in samples.items():
+        for q in PERCENTILES:
+            # P-square percentiles are estimates; on these autocorrelated,
+            # mostly-zero samples allow 10 percentile points or half a minute
+            key = f'{name}_p{q}'
+            percentile_keys.add(key)
+            if len(sample):
+                low, high = sample.quantile([(q - 10) / 100, min(q + 10, 100) / 100])
+                assert low - 0.5 <= online[key] <= high + 0.5, key
+    for key, expected in full.items():
+        if key in percentile_keys:
+            continue
+        if math.isnan(expected):
+            assert math.isnan(online[key]), key
+        else:
+            assert math.isclose(online[key], expected, rel_tol=1e-9, abs_tol=1e-9), key
@@ -0,0 +1,73 @@
+# test_processes.py
+
+import random
+from data_analysis import summarize
+from entities import Patient, REGISTRATION, TRIAGE, DIAGNOSTICS, TREATMENT
+from processes import patient_process
+from simulation import build_simulation, make_config
+
+
+def quiet_hospital(**overrides):
+    """A hospital with no generated arrivals, disasters or rosters."""
+    config = make_config(ARRIVAL_SCALE=0, DISASTER_PROBABILITY=0, STAFF_MODEL='fixed', SIM_TIME=1000,
+                         NUM_DOCTORS=1, **overrides)
+    return build_simulation(config)
+
+
+def admit(env, hospital, patient_id, severity, treatment_time, at=0):
+    """Starts a walk-in patient at time at with fixed stage times; returns it."""
+    def arrive():
+        yield env.timeout(at)
+        patient = Patient(patient_id, 'walk-in', severity, env.now, random.Random(patient_id))
+        patient.service_times = {REGISTRATION: 1, TRIAGE: 1, DIAGNOSTICS: 1, TREATMENT: treatment_time}
+        patients.append(patient)
+        yield env.process(patient_process(env, patient, hospital))
+    patients = []
+    env.process(arrive())
+    return patients
+
+
+def test_preempted_patient_holds_nothing_while_waiting():
+    env, hospital = quiet_hospital(PREEMPTION='resume')
+    victim = admit(env, hospital, 1, 1, 100)
+    admit(env, hospital, 2, 5, 20, at=10)
+    env.run(until=20)
+    # The severity-5 patient took the doctor at 13; the victim gave back its
+    # bed and equipment too and waits for all three as one bundle
+    assert len(hospital.preemptions) == 1
+    stage = (hospital.doctor, hospital.bed, hospital.medical_equipment)
+    assert [tuple(request.resources) for request in hospital.bed.put_queue] == [stage]
+    for resource in stage:
+        assert len(resource.users) == 1
+    env.run(until=200)
+    assert victim[0].discharge_time < 200
+
+
+def preempted_treatment(mode):
+    """A 100-minute treatment from minute 2, preempted at 13 by a 20-minute one."""
+    env, hospital = quiet_hospital(PREEMPTION=mode)
+    victim = admit(env, hospital, 1, 1, 100)
+    admit(env, hospital, 2, 5, 20, at=10)
+    env.run(until=300)
+    return hospital, victim[0]
+
+
+def test_resume_serves_the_remaining_time():
+    hospital, victim = preempted_treatment('resume')
+    assert hospital.preemptions == [(13, 1, 'treatment', 'doctor', 89)]
+    assert victim.timestamps['treatment_end'] == 33 + 89
+
+
+def test_restart_serves_the_whole_stage_again():
+    hospital, victim = preempted_treatment('restart')
+    assert hospital.preemptions == [(13, 1, 'treatment', 'doctor', 100)]
+    assert victim.timestamps['treatment_end'] == 33 + 100
+
+
+def test_preemptions_are_counted_in_the_kpis():
+    hospital, _ = preempted_treatment('resume')
+    assert hospital.doctor.preemptions == 1
+    assert summarize(hospital)['preemptions'] == 1
+    hospital, _ = preempted_treatment('off')
+    assert hospital.preemptions == []
+    assert summarize(hospital)['preemptions'] == 0
@@ -0,0 +1,26 @@
+# test_warmup.py
+
+import random
+from warmup import mser_truncation, welch_truncation
+
+
+def transient_series(rng, warmup=100, length=1000):
+    """Noise around 0 after a linear descent from 10 over the first warmup points."""
+    return [10 * max(0.0, 1 - i / warmup) + rng.gauss(0, 1) for i in range(length)]
+
+
+def test_mser5_truncates_a_known_transient():
+    truncation = mser_truncation(transient_series(random.Random(1)))
+    assert truncation % 5 == 0
+    assert 60 <= truncation <= 150
+
+
+def test_mser5_keeps_a_stationary_series():
+    rng = random.Random(2)
+    assert mser_truncation([rng.gauss(0, 1) for _ in range(1000)]) <= 100
+    assert mser_truncation([1.0] * 19) == 0
+
+
+def test_welch_truncates_the_averaged_transient():
+    replications = [transient_series(random.Random(seed)) for seed in range(5)]
+    assert 60 <= welch_truncation(replications) <= 150
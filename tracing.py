@@ -0,0 +1,178 @@
+# tracing.py
+
+import sys
+from collections import deque
+
+# Trace levels, lowest is most verbose
+DEBUG = 10
+INFO = 20
+WARNING = 30
+
+# Every category has a fixed level; the tracer enables the categories at or above its level
+CATEGORY_LEVELS = {
+    'staff': DEBUG,      # on-duty capacity changes from the rosters
+    'patient': INFO,     # arrivals, stage starts/ends, discharges
+    'emergency': WARNING,  # code blue and disaster events
+}
+
+# Text templates applied at export time only
+MESSAGES = {
+    'arrive': 'Patient {entity} arrives at {time:.2f}',
+    'start': 'Patient {entity} starts {resource} at {time:.2f}',
+    'end': 'Patient {entity} finishes {resource} at {time:.2f}',
+    'discharge': 'Patient {entity} is discharged at {time:.2f}',
+    'code_blue': 'Code Blue! Patient {entity} requires immediate attention at {time:.2f}',
+    'stabilized': 'Patient {entity} stabilized after Code Blue at {time:.2f}',
+    'disaster': 'Disaster occurred at {time:.2f}! Sudden influx of patients.',
+    'preempted': 'Patient {entity} loses the {resource} to a higher priority patient at {time:.2f}',
+    'capacity': 'On-duty {entity} capacity is {resource} at {time:.2f}',
+}
+
+
+class NullSink:
+    """Discards every record."""
+
+    def write(self, record):
+        pass
+
+    def close(self):
+        pass
+
+
+class RingBufferSink:
+    """Keeps the most recent records in memory."""
+
+    def __init__(self, maxlen=100000):
+        self.buffer = deque(maxlen=maxlen)
+        self.write = self.buffer.append
+
+    def records(self):
+        return list(self.buffer)
+
+    def close(self):
+        pass
+
+
+class JSONLSink:
+    """Writes records to a JSON Lines file in buffered batches."""
+
+    def __init__(self, path, buffer_size=4096):
+        # Serializers load with the first file sink, not with the simulation core
+        import json
+        self.dumps = json.dumps
+        self.file = open(path, 'w', encoding='utf-8')
+        self.buffer_size = buffer_size
+        self.pending = []
+
+    def write(self, record):
+        self.pending.append(record)
+        if len(self.pending) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.file.write(''.join(self.dumps(record) + '\n' for record in self.pending))
+            self.pending = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class BinarySink:
+    """Writes records to a binary file as pickled batches."""
+
+    def __init__(self, path, buffer_size=4096):
+        import pickle
+        self.pickle = pickle
+        self.file = open(path, 'wb')
+        self.buffer_size = buffer_size
+        self.pending = []
+
+    def write(self, record):
+        self.pending.append(record)
+        if len(self.pending) >= self.buffer_size:
+            self.flush()
+
+    def flush(self):
+        if self.pending:
+            self.pickle.dump(self.pending, self.file, protocol=self.pickle.HIGHEST_PROTOCOL)
+            self.pending = []
+
+    def close(self):
+        self.flush()
+        self.file.close()
+
+
+class Tracer:
+    """Routes structured trace records to a sink.
+
+    Each category is exposed as a boolean attribute (tracer.patient,
+    tracer.staff, tracer.emergency) so call sites pay a single branch
+    when tracing is off:
+
+        if tracer.patient:
+            tracer.emit(env.now, 'patient', patient.patient_id, 'arrive')
+    """
+
+    def __init__(self, sink=None, level=INFO, categories=None):
+        self.sink = sink if sink is not None else NullSink()
+        self.level = level
+        self.categories = set(CATEGORY_LEVELS) if categories is None else set(categories)
+        enabled = not isinstance(self.sink, NullSink)
+        for category, category_level in CATEGORY_LEVELS.items():
+            setattr(self, category, enabled and category_level >= level and category in self.categories)
+
+    def emit(self, time, category, entity, event, resource=None):
+        """Records (time, category, entity, event, resource) without formatting."""
+        self.sink.write((time, category, entity, event, resource))
+
+    def close(self):
+        self.sink.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+
+# Shared disabled tracer used when none is given
+NULL_TRACER = Tracer()
+
+
+def read_jsonl(path):
+    """Yields records from a JSONL trace file."""
+    import json
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            yield tuple(json.loads(line))
+
+
+def read_binary(path):
+    """Yields records from a binary trace file."""
+    import pickle
+    with open(path, 'rb') as f:
+        while True:
+            try:
+                batch = pickle.load(f)
+            except EOFError:
+                return
+            yield from batch
+
+
+def format_record(record):
+    """Formats one trace record as a human-readable line."""
+    time, category, entity, event, resource = record
+    template = MESSAGES.get(event)
+    if template is None:
+        return f'{time:.2f} [{category}] {entity} {event} {resource or ""}'.rstrip()
+    return template.format(time=time, entity=entity, resource=resource)
+
+
+def export_text(records, stream=None):
+    """Writes records as text, e.g. export_text(read_jsonl(path))."""
+    if stream is None:
+        stream = sys.stdout
+    for record in records:
+        stream.write(format_record(record) + '\n')
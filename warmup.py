@@ -0,0 +1,114 @@
+# warmup.py
+
+import math
+
+# Resources whose utilization series are checked for the initial transient
+WARMUP_RESOURCES = ['doctor', 'nurse', 'bed', 'operating_room', 'medical_equipment']
+
+
+def mser_truncation(values, batch_size=5):
+    """Number of leading observations to delete, by MSER-m (MSER-5 by default).
+
+    Observations are averaged in batches of batch_size and the truncation
+    point d minimizing the marginal standard error of the remaining batch
+    means is chosen, searching only the first half of the series.
+    """
+    k = len(values) // batch_size
+    if k < 4:
+        return 0
+    batches = [sum(values[i * batch_size:(i + 1) * batch_size]) / batch_size for i in range(k)]
+    best_d, best_score = 0, math.inf
+    total = total_sq = 0.0
+    # Walk backwards so suffix sums give every candidate in O(k)
+    for d in range(k - 1, -1, -1):
+        total += batches[d]
+        total_sq += batches[d] * batches[d]
+        n = k - d
+        if d <= k // 2 and n > 1:
+            score = (total_sq - total * total / n) / (n * n)
+            if score <= best_score:
+                best_d, best_score = d, score
+    return best_d * batch_size
+
+
+def welch_average(replications, window):
+    """Welch's method: averages series across replications, then smooths
+    them with a centered moving average of half-width window."""
+    length = min(len(series) for series in replications)
+    averaged = [sum(series[i] for series in replications) / len(replications) for i in range(length)]
+    smoothed = []
+    for i in range(length):
+        half = min(window, i, length - 1 - i)
+        segment = averaged[i - half:i + half + 1]
+        smoothed.append(sum(segment) / len(segment))
+    return smoothed
+
+
+def welch_truncation(replications, window=5):
+    """Truncation index of the Welch curve.
+
+    Rather than reading the knee off a plot, MSER is applied to the
+    averaged, smoothed curve (batch size 1, since it is already smoothed).
+    """
+    return mser_truncation(welch_average(replications, window), batch_size=1)
+
+
+def _pilot_series(hospital, resolution):
+    """Utilization series per resource and the discharge stream of a pilot run."""
+    log = hospital.utilization.sample(resolution)
+    times = [entry['time'] for entry in log]
+    utilization = {name: [entry[f'{name}_utilization'] for entry in log] for name in WARMUP_RESOURCES}
+    columns = hospital.patients.columns()
+    discharges = sorted(zip(columns['discharge_time'], columns['arrival_time']))
+    discharge_times = [d for d, _ in discharges]
+    total_times = [d - a for d, a in discharges]
+    return times, utilization, discharge_times, total_times
+
+
+def detect_warmup(config, seed=None, method='mser5', pilots=5, resolution=5):
+    """Estimates the warm-up time (minutes) of a scenario from pilot runs.
+
+    The pilot runs the full SIM_TIME without truncation. The warm-up is the
+    latest truncation point found over the utilization series of
+    WARMUP_RESOURCES and the discharge stream (total time in system in
+    discharge order). method is 'mser5' (one pilot) or 'welch' (pilots
+    replications averaged per series).
+    """
+    from simulation import run_simulation
+    from rng import replication_seeds
+    pilot_config = dict(config, WARMUP_TIME=0, STATS_MODE='full', UTILIZATION_HISTORY=True)
+    base_seed = config['RANDOM_SEED'] if seed is None else seed
+    if method == 'mser5':
+        times, utilization, discharge_times, total_times = _pilot_series(
+            run_simulation(pilot_config, seed=base_seed), resolution)
+        candidates = [0.0]
+        for series in utilization.values():
+            index = mser_truncation(series)
+            candidates.append(times[index] if index < len(times) else 0.0)
+        index = mser_truncation(total_times)
+        if index < len(discharge_times):
+            candidates.append(discharge_times[index])
+        return max(candidates)
+    if method == 'welch':
+        runs = [_pilot_series(run_simulation(pilot_config, seed=s), resolution)
+                for s in replication_seeds(base_seed, pilots)]
+        times = runs[0][0]
+        candidates = [0.0]
+        for name in WARMUP_RESOURCES:
+            index = welch_truncation([run[1][name] for run in runs])
+            candidates.append(times[min(index, len(times) - 1)])
+        # Discharge streams are aligned by discharge order
+        index = welch_truncation([run[3] for run in runs])
+        shortest = min(runs, key=lambda run: len(run[2]))
+        if index < len(shortest[2]):
+            candidates.append(shortest[2][index])
+        return max(candidates)
+    raise ValueError(f'Unknown warm-up detection method: {method}')
+
+
+def resolve_warmup(config, seed=None):
+    """Returns config with WARMUP_TIME='auto' replaced by a detected value."""
+    if config.get('WARMUP_TIME') != 'auto':
+        return config
+    method = config.get('WARMUP_METHOD', 'mser5')
+    return dict(config, WARMUP_TIME=detect_warmup(config, seed=seed, method=method))